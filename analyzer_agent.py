@@ -4,12 +4,114 @@ import argparse
 import json
 import os
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, Counter
+
+from instrumentation import configure_from_env, inc, timer
+
+MIN_CONFOUNDER_DRUGS = 3
+
+def confounder_index_path(output_file):
+    path = Path(output_file)
+    return path.with_name(f"{path.stem}.confounders.json")
+
+def add_confounder_postings(confounder_postings, drug, side_effect, confounders):
+    if not isinstance(confounders, list):
+        return
+    for conf in set(c for c in confounders if isinstance(c, str)):
+        confounder_postings[conf][(drug, side_effect)] += 1
+
+class ConfounderIndex:
+    FORMAT = 2
+
+    def __init__(self, min_drugs, ranking, summaries, postings=None, path=None, data_start=0):
+        self.min_drugs = min_drugs
+        self.ranking = ranking
+        self.summaries = summaries
+        self.postings = postings
+        self.path = path
+        self.data_start = data_start
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            data_start = f.tell()
+        if not isinstance(header, dict) or header.get('format') != cls.FORMAT:
+            raise ValueError(f"{path} is not a format {cls.FORMAT} confounder index")
+        return cls(header['min_drugs'], header['ranking'], header['confounders'], path=path, data_start=data_start)
+
+    def __len__(self):
+        return len(self.summaries)
+
+    def __contains__(self, conf):
+        return conf in self.summaries
+
+    def names(self):
+        return list(self.summaries)
+
+    def read_postings(self, conf):
+        if self.postings is not None:
+            return self.postings[conf]
+        summary = self.summaries[conf]
+        with open(self.path, 'rb') as f:
+            f.seek(self.data_start + summary['offset'])
+            return json.loads(f.read(summary['length']))
+
+    def entry(self, conf):
+        if conf not in self.summaries:
+            return None
+        summary = self.summaries[conf]
+        return {'drugs': summary['drugs'], 'symptoms': summary['symptoms'], 'score': summary['score'],
+                'postings': self.read_postings(conf)}
+
+    def items(self):
+        for conf in self.summaries:
+            yield conf, self.entry(conf)
+
+    def write(self, path):
+        lines, summaries, offset = [], {}, 0
+        for conf, summary in self.summaries.items():
+            line = json.dumps(self.read_postings(conf), ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+            summaries[conf] = {'drugs': summary['drugs'], 'symptoms': summary['symptoms'], 'score': summary['score'],
+                               'offset': offset, 'length': len(line)}
+            lines.append(line)
+            offset += len(line)
+        header = {'format': self.FORMAT, 'min_drugs': self.min_drugs, 'ranking': self.ranking, 'confounders': summaries}
+        with open(path, 'wb') as f:
+            f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+            f.writelines(lines)
+
+def build_confounder_index(confounder_postings):
+    summaries, postings = {}, {}
+    for conf, counts in confounder_postings.items():
+        drugs = {drug for drug, _ in counts}
+        symptoms = {symptom for _, symptom in counts}
+        summaries[conf] = {
+            'drugs': len(drugs),
+            'symptoms': len(symptoms),
+            'score': len(symptoms) / len(drugs)
+        }
+        postings[conf] = [[drug, symptom, count] for (drug, symptom), count in counts.most_common()]
+    
+    ranking = sorted(
+        (conf for conf, summary in summaries.items() if summary['drugs'] >= MIN_CONFOUNDER_DRUGS),
+        key=lambda conf: (-summaries[conf]['score'], conf)
+    )
+    return ConfounderIndex(MIN_CONFOUNDER_DRUGS, ranking, summaries, postings)
+
+def confounder_index_from_analysis(data):
+    confounder_postings = defaultdict(Counter)
+    for drug, symptoms in data.items():
+        for symptom, entries in symptoms.items():
+            for entry in entries:
+                add_confounder_postings(confounder_postings, drug, symptom, entry.get('confounders'))
+    return build_confounder_index(confounder_postings)
 
 def analyze_side_effects(aggregate_folder, output_file):
     aggregate_path = Path(aggregate_folder)
     
     side_effects_data = defaultdict(lambda: defaultdict(list))
+    confounder_postings = defaultdict(Counter)
     
     json_files = list(aggregate_path.glob('*.json'))
     
@@ -25,8 +127,10 @@ def analyze_side_effects(aggregate_folder, output_file):
         try:
             drug_canonical = file_path.stem
             
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with timer('analyzer_parse_seconds'), open(file_path, 'r', encoding='utf-8') as f:
                 extractions = json.load(f)
+            inc('analyzer_files_total')
+            inc('analyzer_extractions_total', len(extractions))
             
             print(f"Processing {drug_canonical}: {len(extractions)} extractions")
             total_extractions += len(extractions)
@@ -45,6 +149,7 @@ def analyze_side_effects(aggregate_folder, output_file):
                 }
                 
                 side_effects_data[drug_canonical][side_effect].append(metrics)
+                add_confounder_postings(confounder_postings, drug_canonical, side_effect, metrics['confounders'])
                 
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON file {file_path}: {e}")
@@ -57,8 +162,13 @@ def analyze_side_effects(aggregate_folder, output_file):
     }
     
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        with timer('analyzer_write_seconds', output='analysis'):
+            if Path(output_file).suffix == '.echocol':
+                from columnar_store import write_analysis
+                write_analysis(output_file, output_data)
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(output_data, f, indent=2, ensure_ascii=False)
         
         print(f"\nAnalysis complete!")
         print(f"Processed {total_extractions} total extractions")
@@ -70,6 +180,14 @@ def analyze_side_effects(aggregate_folder, output_file):
         
     except Exception as e:
         print(f"Error writing output file {output_file}: {e}")
+        return
+    
+    index_file = confounder_index_path(output_file)
+    try:
+        build_confounder_index(confounder_postings).write(index_file)
+        print(f"Confounder index saved to: {index_file}")
+    except Exception as e:
+        print(f"Error writing confounder index {index_file}: {e}")
 
 def main():
     parser = argparse.ArgumentParser(
@@ -85,7 +203,7 @@ def main():
         '--output-file',
         '-o',
         default='side_effects_analysis.json',
-        help='Path to the output JSON file (default: side_effects_analysis.json)'
+        help='Path to the output file; a .echocol suffix writes the columnar format (default: side_effects_analysis.json)'
     )
     
     args = parser.parse_args()
@@ -102,4 +220,5 @@ def main():
     return 0
 
 if __name__ == '__main__':
+    configure_from_env()
     exit(main())
\ No newline at end of file
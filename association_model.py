@@ -0,0 +1,150 @@
+# Association Model: Columnar drug-symptom aggregates with cached sort permutations for the Echo table
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import ColumnarEvidence, ColumnarFile
+from evidence_store import EvidenceStore, EvidenceWriter
+
+METRIC_FIELDS = {
+    'avg_temporal': 'temporal_weight',
+    'avg_confidence': 'confidence',
+    'avg_community': 'community_metric',
+}
+NUMERIC_COLUMNS = ('avg_temporal', 'avg_confidence', 'avg_community', 'novelty_score')
+TEXT_COLUMNS = ('drug', 'symptom')
+DEFAULT_ORDER = ('novelty_score', True)
+
+
+def metric_frame(drugs, symptoms, sizes: np.ndarray, values: Dict[str, np.ndarray],
+                 offsets: np.ndarray, lengths: np.ndarray) -> pd.DataFrame:
+    pair_ids = np.repeat(np.arange(len(sizes)), sizes)
+    frame = pd.DataFrame({'drug': drugs, 'symptom': symptoms})
+    for column, field in METRIC_FIELDS.items():
+        sums = np.bincount(pair_ids, weights=values[field], minlength=len(sizes))
+        frame[column] = sums / np.maximum(sizes, 1)
+    frame['novelty_score'] = frame[list(METRIC_FIELDS)].sum(axis=1) / 3
+    frame[list(NUMERIC_COLUMNS)] = frame[list(NUMERIC_COLUMNS)].round(3)
+    frame['n_reports'] = sizes
+    frame['evidence_offset'] = np.asarray(offsets, dtype=np.int64)
+    frame['evidence_length'] = np.asarray(lengths, dtype=np.int64)
+    return frame
+
+
+def aggregate_frame(items: Iterable[Tuple[str, str, List[Dict]]], evidence: EvidenceWriter) -> pd.DataFrame:
+    drugs, symptoms, sizes = [], [], []
+    values = {field: [] for field in METRIC_FIELDS.values()}
+    offsets, lengths = [], []
+
+    for drug, symptom, entries in items:
+        if symptom == 'null' or not entries:
+            continue
+        drugs.append(drug)
+        symptoms.append(symptom)
+        sizes.append(len(entries))
+        for entry in entries:
+            for field, column in values.items():
+                column.append(entry.get(field) or 0)
+        offset, length = evidence.add(entries)
+        offsets.append(offset)
+        lengths.append(length)
+
+    values = {field: np.asarray(column, dtype=np.float64) for field, column in values.items()}
+    return metric_frame(drugs, symptoms, np.asarray(sizes, dtype=np.int64), values, offsets, lengths)
+
+
+def columnar_frame(table: ColumnarFile) -> pd.DataFrame:
+    entry_offsets = table.numeric('pairs', 'entry_offsets')
+    sizes = np.diff(entry_offsets)
+    symptoms = table.decoded('pairs', 'symptom')
+    keep = (symptoms != 'null') & (sizes > 0)
+    entry_keep = np.repeat(keep, sizes)
+    values = {field: np.nan_to_num(table.numeric('entries', field)[entry_keep]) for field in METRIC_FIELDS.values()}
+    return metric_frame(table.decoded('pairs', 'drug')[keep], symptoms[keep], sizes[keep], values,
+                        entry_offsets[:-1][keep], sizes[keep])
+
+
+def iter_pairs(raw_data: Dict) -> Iterable[Tuple[str, str, List[Dict]]]:
+    for drug, symptoms in raw_data.items():
+        for symptom, entries in symptoms.items():
+            yield drug, symptom, entries
+
+
+class AssociationModel:
+    def __init__(self, frame: Optional[pd.DataFrame] = None):
+        self.chunks = []
+        self.offsets = [0]
+        self._frame = None
+        self._orders = {}
+        if frame is not None:
+            self.append(frame)
+
+    @classmethod
+    def from_raw(cls, raw_data: Dict, evidence_file=None, source=None) -> Tuple['AssociationModel', EvidenceStore]:
+        writer = EvidenceWriter(evidence_file, source)
+        try:
+            model = cls(aggregate_frame(iter_pairs(raw_data), writer))
+        except Exception:
+            writer.abort()
+            raise
+        writer.close()
+        return model, writer.open_store()
+
+    @classmethod
+    def from_columnar(cls, path) -> Tuple['AssociationModel', ColumnarEvidence]:
+        table = ColumnarFile(path)
+        try:
+            model = cls(columnar_frame(table))
+        finally:
+            table.close()
+        return model, ColumnarEvidence(path)
+
+    def __len__(self) -> int:
+        return self.offsets[-1]
+
+    def append(self, chunk: pd.DataFrame):
+        if not len(chunk):
+            return
+        self.chunks.append(chunk.reset_index(drop=True))
+        self.offsets.append(self.offsets[-1] + len(chunk))
+        self._frame = None
+        self._orders.clear()
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            if len(self.chunks) > 1:
+                self.chunks = [pd.concat(self.chunks, ignore_index=True)]
+                self.offsets = [0, len(self.chunks[0])]
+            self._frame = self.chunks[0] if self.chunks else aggregate_frame([], EvidenceWriter())
+        return self._frame
+
+    def row(self, i: int) -> Dict:
+        chunk = bisect_right(self.offsets, i) - 1
+        return self.chunks[chunk].iloc[i - self.offsets[chunk]].to_dict()
+
+    def ascending_order(self, column: str) -> np.ndarray:
+        if column not in self._orders:
+            values = self.frame[column]
+            if column in TEXT_COLUMNS:
+                values = values.str.lower()
+            self._orders[column] = values.to_numpy().argsort(kind='stable')
+        return self._orders[column]
+
+    def order(self, column: str, reverse: bool = False) -> np.ndarray:
+        ascending = self.ascending_order(column)
+        return ascending[::-1] if reverse else ascending
+
+    def view(self, column: Optional[str] = None, reverse: bool = False,
+             rows: Optional[Iterable[int]] = None) -> np.ndarray:
+        if column is None:
+            column, reverse = DEFAULT_ORDER
+        order = self.order(column, reverse)
+        if rows is None:
+            return order
+        mask = np.zeros(len(self), dtype=bool)
+        mask[np.fromiter(rows, dtype=np.int64)] = True
+        return order[mask[order]]
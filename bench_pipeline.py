@@ -0,0 +1,171 @@
+# Pipeline Benchmark: Times extraction, analysis, proposer ranking and Echo loading on synthetic corpora
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+from typing import Dict
+
+import explorer_agent
+from analyzer_agent import analyze_side_effects
+from association_model import AssociationModel
+from instrumentation import configure_from_env
+from proposer_agent import load_confounder_index, top_confounders
+from search_index import AssociationSearchIndex
+from synthetic_corpus import read_marker, write_corpus, iter_posts
+
+DEFAULT_SCALES = [10000, 100000, 1000000]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'bench_pipeline_baseline.json'
+STAGES = ['simple_extraction', 'analyze_side_effects', 'proposer_ranking', 'process_data']
+
+
+def bench_extraction(corpus_dir: Path, work_dir: Path) -> Dict:
+    output_dir = work_dir / 'reddit_data'
+    output_dir.mkdir()
+    original = explorer_agent.OUTPUT_DIR
+    explorer_agent.OUTPUT_DIR = str(output_dir)
+    elapsed, posts, extractions = 0.0, 0, 0
+    try:
+        for post in iter_posts(corpus_dir / 'posts.jsonl'):
+            start = time.perf_counter()
+            result = explorer_agent.simple_extraction(post)
+            elapsed += time.perf_counter() - start
+            posts += 1
+            extractions += len(result['extractions'])
+    finally:
+        explorer_agent.OUTPUT_DIR = original
+        shutil.rmtree(output_dir)
+    return {'seconds': elapsed, 'items': posts, 'extractions': extractions}
+
+
+def bench_analysis(corpus_dir: Path, work_dir: Path) -> Dict:
+    output_file = work_dir / 'side_effects_analysis.json'
+    start = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        analyze_side_effects(corpus_dir / 'aggregate', output_file)
+    elapsed = time.perf_counter() - start
+    with open(corpus_dir / 'corpus.json', 'r', encoding='utf-8') as f:
+        extractions = json.load(f)['extractions']
+    return {'seconds': elapsed, 'items': extractions}
+
+
+def bench_proposer(corpus_dir: Path, top_n: int = 10) -> Dict:
+    analysis_file = corpus_dir / 'side_effects_analysis.json'
+    start = time.perf_counter()
+    index = load_confounder_index(str(analysis_file))
+    ranked = top_confounders(index, top_n)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'items': len(index), 'top': ranked[0][0] if ranked else None}
+
+
+def bench_process_data(corpus_dir: Path, work_dir: Path) -> Dict:
+    start = time.perf_counter()
+    with open(corpus_dir / 'side_effects_analysis.json', 'r', encoding='utf-8') as f:
+        raw_data = json.load(f)
+    model, evidence = AssociationModel.from_raw(raw_data, work_dir / 'side_effects_analysis.evidence.jsonl')
+    AssociationSearchIndex(model.frame)
+    model.view()
+    elapsed = time.perf_counter() - start
+    evidence.close()
+    return {'seconds': elapsed, 'items': len(model)}
+
+
+def run_scale(n_posts: int, seed: int, data_dir: Path) -> Dict:
+    corpus_dir = data_dir / f"corpus_{n_posts}_{seed}"
+    marker = read_marker(corpus_dir)
+    if not marker or not marker.get('complete', True):
+        print(f"Generating {n_posts} posts in {corpus_dir}...")
+        write_corpus(corpus_dir, n_posts, seed)
+
+    results = {}
+    with tempfile.TemporaryDirectory(dir=data_dir) as work:
+        work_dir = Path(work)
+        results['simple_extraction'] = bench_extraction(corpus_dir, work_dir)
+        results['analyze_side_effects'] = bench_analysis(corpus_dir, work_dir)
+        results['proposer_ranking'] = bench_proposer(corpus_dir)
+        results['process_data'] = bench_process_data(corpus_dir, work_dir)
+    for result in results.values():
+        result['posts_per_second'] = round(n_posts / result['seconds'], 1) if result['seconds'] else 0.0
+        result['seconds'] = round(result['seconds'], 4)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> int:
+    regressions = 0
+    print(f"\nComparison with baseline from {baseline.get('created_at', 'unknown')} ({baseline.get('machine', '?')}):")
+    print(f"{'posts':>9}  {'stage':<22}{'baseline s':>12}{'current s':>12}{'change':>9}")
+    for scale, stages in results.items():
+        for stage, result in stages.items():
+            before = baseline.get('results', {}).get(scale, {}).get(stage)
+            if not before:
+                continue
+            change = (result['seconds'] - before['seconds']) / before['seconds'] if before['seconds'] else 0.0
+            flag = ' !' if change > threshold else ''
+            regressions += bool(flag)
+            print(f"{scale:>9}  {stage:<22}{before['seconds']:>12.3f}{result['seconds']:>12.3f}{change:>+9.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Echo pipeline stages on synthetic corpora')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help='Corpus sizes in posts (default: 10000 100000 1000000)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'echo_bench'),
+                        help='Where generated corpora are cached between runs')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                        help='Baseline results to compare against (default: bench_pipeline_baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown flagged as a regression (default: 0.2)')
+    parser.add_argument('--output', '-o', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    print(f"{'posts':>9}  {'stage':<22}{'seconds':>10}{'posts/s':>12}")
+    for n_posts in args.scales:
+        results[str(n_posts)] = run_scale(n_posts, args.seed, data_dir)
+        for stage in STAGES:
+            result = results[str(n_posts)][stage]
+            print(f"{n_posts:>9}  {stage:<22}{result['seconds']:>10.3f}{result['posts_per_second']:>12.1f}")
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': f"{platform.machine()} / {os.cpu_count()} cpu / Python {platform.python_version()}",
+        'seed': args.seed,
+        'results': results
+    }
+
+    regressions = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                previous = json.load(f).get('results', {})
+            report['results'] = {**previous, **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to: {args.baseline}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    configure_from_env()
+    exit(main())
@@ -0,0 +1,132 @@
+# Query Service Benchmark: Concurrent-client load test reporting p50/p99 latency per endpoint mix
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlencode, urlparse
+
+from query_service import start_server
+
+SORTS = ['drug', 'symptom', 'avg_temporal', 'avg_confidence', 'avg_community', 'novelty_score']
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def build_requests(host: str, port: int, count: int, seed: int) -> List[str]:
+    conn = http.client.HTTPConnection(host, port)
+    conn.request('GET', '/associations?' + urlencode({'limit': 1000}))
+    rows = json.loads(conn.getresponse().read())['rows']
+    conn.close()
+
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        kind = rng.random()
+        row = rng.choice(rows) if rows else {'drug': '', 'symptom': ''}
+        if kind < 0.5:
+            params = {'sort': rng.choice(SORTS), 'order': rng.choice(['asc', 'desc']),
+                      'offset': rng.randrange(0, 500), 'limit': 50}
+        elif kind < 0.8:
+            prefix = row['drug'][:rng.randint(1, max(1, len(row['drug'])))]
+            params = {'q': f"drug:{prefix}", 'sort': 'novelty_score', 'order': 'desc', 'limit': 50}
+        else:
+            requests.append('/evidence?' + urlencode({'drug': row['drug'], 'symptom': row['symptom']}))
+            continue
+        requests.append('/associations?' + urlencode(params))
+    return requests
+
+
+def client(host: str, port: int, paths: List[str], deadline: float, latencies: List[float], errors: List[int]):
+    conn = http.client.HTTPConnection(host, port)
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+        except (http.client.HTTPException, OSError):
+            errors.append(0)
+            conn.close()
+            conn = http.client.HTTPConnection(host, port)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_level(host: str, port: int, paths: List[str], clients: int, duration: float) -> Dict:
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = []
+    for c in range(clients):
+        offset = c * len(paths) // clients
+        rotated = paths[offset:] + paths[:offset]
+        threads.append(threading.Thread(target=client, args=(host, port, rotated, deadline, latencies, errors)))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput': round(len(latencies) / duration, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Echo query service')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--file', help='Analyzer JSON to serve from an in-process query service')
+    target.add_argument('--url', help='Base URL of a running query service')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16, 64],
+                        help='Concurrent client counts to test (default: 1 4 16 64)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per concurrency level (default: 5)')
+    parser.add_argument('--requests', type=int, default=2000, help='Distinct request paths in the mix (default: 2000)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the request mix (default: 0)')
+    parser.add_argument('--output', '-o', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    server = None
+    if args.file:
+        server = start_server(args.file, reload_interval=0)
+        host, port = server.server_address
+    else:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+
+    try:
+        paths = build_requests(host, port, args.requests, args.seed)
+        results = []
+        print(f"{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for clients in args.clients:
+            result = run_level(host, port, paths, clients, args.duration)
+            results.append(result)
+            print(f"{clients:>8}{result['throughput']:>10}{result['p50_ms']:>10}{result['p99_ms']:>10}{result['errors']:>8}")
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# Verifier Benchmark: Measures end-to-end Verifier throughput against the local openFDA stub
+
+import argparse
+import json
+import time
+from typing import Dict, List, Tuple
+
+from instrumentation import configure_from_env
+from openfda_stub import load_fixture, start_server
+from verifier_agent import FDAAdverseReactionExtractor, get_variants_and_terms, get_side_effect_score
+
+SCENARIOS = {
+    'baseline': {},
+    'latency': {'latency': 0.02, 'jitter': 0.01},
+    'errors': {'error_rate': 0.05},
+    'throttled': {'rate_limit': 20.0},
+    'degraded': {'latency': 0.02, 'jitter': 0.01, 'error_rate': 0.05, 'rate_limit': 20.0},
+}
+
+
+def pairs_from_fixture(fixture: Dict) -> List[Tuple[str, str]]:
+    return [(drug, term.lower()) for drug, events in fixture.get('events', {}).items() for term, _ in events]
+
+
+def pairs_from_analysis(path: str) -> List[Tuple[str, str]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [(drug, symptom) for drug, symptoms in data.items() for symptom in symptoms if symptom != 'null']
+
+
+def run_verifier(base_url: str, pairs: List[Tuple[str, str]], max_retries: int, backoff: float,
+                 timeout: float = 10.0) -> Dict:
+    extractor = FDAAdverseReactionExtractor(base_url=base_url, max_retries=max_retries, backoff=backoff,
+                                            timeout=timeout)
+    by_drug = {}
+    for drug, symptom in pairs:
+        by_drug.setdefault(drug, []).append(symptom)
+
+    failures = 0
+    errored_pairs = 0
+    start = time.perf_counter()
+    for drug, symptoms in by_drug.items():
+        drug_errors = sum(extractor.errors.values())
+        variants, faers_terms = get_variants_and_terms(extractor, drug)
+        drug_errors = sum(extractor.errors.values()) - drug_errors
+        for symptom in symptoms:
+            pair_errors = sum(extractor.errors.values())
+            try:
+                get_side_effect_score(extractor, variants, faers_terms, drug, symptom)
+            except Exception:
+                failures += 1
+            if drug_errors or sum(extractor.errors.values()) > pair_errors:
+                errored_pairs += 1
+    elapsed = time.perf_counter() - start
+    return {'elapsed': elapsed, 'failures': failures, 'errored_pairs': errored_pairs,
+            'request_errors': sum(extractor.errors.values())}
+
+
+def run_scenario(name: str, settings: Dict, fixture: Dict, pairs: List[Tuple[str, str]],
+                 repeat: int, max_retries: int, backoff: float, timeout: float = 10.0) -> Dict:
+    server = start_server(fixture=fixture, seed=0, **settings)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        elapsed = 0.0
+        failures = errored_pairs = request_errors = 0
+        for _ in range(repeat):
+            result = run_verifier(base_url, pairs, max_retries, backoff, timeout)
+            elapsed += result['elapsed']
+            failures += result['failures']
+            errored_pairs += result['errored_pairs']
+            request_errors += result['request_errors']
+        stats = dict(server.stats)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    total_pairs = len(pairs) * repeat
+    return {
+        'scenario': name,
+        'settings': settings,
+        'pairs': total_pairs,
+        'seconds': round(elapsed, 4),
+        'pairs_per_second': round(total_pairs / elapsed, 2) if elapsed else None,
+        'clean_pairs_per_second': round((total_pairs - errored_pairs) / elapsed, 2) if elapsed else None,
+        'requests_per_pair': round(stats.get('requests', 0) / total_pairs, 3) if total_pairs else None,
+        'failures': failures,
+        'errored_pairs': errored_pairs,
+        'request_errors': request_errors,
+        'server': stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Verifier throughput against a local openFDA stub')
+    parser.add_argument('--fixture', help='Fixture JSON for the stub (default: built-in)')
+    parser.add_argument('--analysis', help='Analyzer output to take drug-symptom pairs from (default: fixture pairs)')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run, may be repeated (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the pair list per scenario (default: 3)')
+    parser.add_argument('--max-retries', type=int, default=3, help='Verifier retries on HTTP 429 and 5xx (default: 3)')
+    parser.add_argument('--backoff', type=float, default=0.05, help='Verifier base backoff in seconds (default: 0.05)')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds (default: 10)')
+    parser.add_argument('--output', '-o', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    pairs = pairs_from_analysis(args.analysis) if args.analysis else pairs_from_fixture(fixture)
+    if not pairs:
+        print("No drug-symptom pairs to benchmark")
+        return 1
+
+    results = []
+    print(f"Benchmarking {len(pairs)} pairs x {args.repeat} passes")
+    print(f"{'scenario':<12}{'pairs/s':>12}{'clean/s':>12}{'req/pair':>12}{'errored':>10}{'429s':>8}{'500s':>8}")
+    for name in args.scenario or list(SCENARIOS):
+        result = run_scenario(name, SCENARIOS[name], fixture, pairs, args.repeat, args.max_retries, args.backoff,
+                              args.timeout)
+        results.append(result)
+        print(f"{name:<12}{result['pairs_per_second']:>12}{result['clean_pairs_per_second']:>12}"
+              f"{result['requests_per_pair']:>12}{result['errored_pairs'] + result['failures']:>10}"
+              f"{result['server'].get('status_429', 0):>8}"
+              f"{result['server'].get('status_500', 0):>8}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    configure_from_env()
+    exit(main())
@@ -0,0 +1,336 @@
+# Columnar Store: Memory-mappable binary analysis format with dictionary-encoded strings, plus JSON converters
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from evidence_store import EVIDENCE_CACHE_SIZE, CachedEvidence
+
+MAGIC = b'ECHOCOL1'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+COLUMNAR_SUFFIX = '.echocol'
+NUMERIC_FIELDS = ('temporal_weight', 'confidence', 'community_metric')
+ENTRY_FIELDS = NUMERIC_FIELDS + ('confounders', 'quote')
+
+
+def is_columnar(path) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def encode_strings(values: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [v.encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in encoded], out=offsets[1:])
+    return {'offsets': offsets, 'data': np.frombuffer(b''.join(encoded), dtype=np.uint8)}
+
+
+class DictionaryEncoder:
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def buffers(self) -> Dict[str, np.ndarray]:
+        dictionary = encode_strings(self.values)
+        return {'dictionary_offsets': dictionary['offsets'], 'dictionary_data': dictionary['data']}
+
+
+def write_tables(path, tables: Dict[str, Dict], metadata: Optional[Dict] = None):
+    header = {'version': FORMAT_VERSION, 'metadata': metadata or {}, 'tables': {}}
+    buffers = []
+    position = 0
+    for table_name, table in tables.items():
+        columns = {}
+        for column_name, (kind, column_buffers, extra) in table['columns'].items():
+            layout = {}
+            for buffer_name, array in column_buffers.items():
+                array = np.ascontiguousarray(array)
+                position = -(-position // ALIGNMENT) * ALIGNMENT
+                layout[buffer_name] = [position, array.dtype.str, len(array)]
+                buffers.append((position, array))
+                position += array.nbytes
+            columns[column_name] = {'kind': kind, 'buffers': layout, **extra}
+        header['tables'][table_name] = {'rows': table['rows'], 'columns': columns}
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+        for offset, array in buffers:
+            f.write(b'\0' * (data_start + offset - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp, path)
+
+
+class ColumnarFile:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(self.path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an Echo columnar file")
+        header_length, = struct.unpack_from('<Q', self.data, len(MAGIC))
+        header_end = len(MAGIC) + 8 + header_length
+        self.header = json.loads(self.data[len(MAGIC) + 8:header_end])
+        if self.header['version'] != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported columnar format version {self.header['version']}")
+        self.data_start = -(-header_end // ALIGNMENT) * ALIGNMENT
+        self.metadata = self.header['metadata']
+        self.dictionaries = {}
+
+    def rows(self, table: str) -> int:
+        return self.header['tables'][table]['rows']
+
+    def spec(self, table: str, column: str) -> Dict:
+        return self.header['tables'][table]['columns'][column]
+
+    def buffer(self, table: str, column: str, name: str) -> Optional[np.ndarray]:
+        layout = self.spec(table, column)['buffers'].get(name)
+        if layout is None:
+            return None
+        offset, dtype, count = layout
+        return np.frombuffer(self.data, dtype=np.dtype(dtype), count=count, offset=self.data_start + offset)
+
+    def numeric(self, table: str, column: str) -> np.ndarray:
+        return self.buffer(table, column, 'values')
+
+    def codes(self, table: str, column: str) -> np.ndarray:
+        return self.buffer(table, column, 'codes')
+
+    def nulls(self, table: str, column: str) -> Optional[np.ndarray]:
+        return self.buffer(table, column, 'nulls')
+
+    def dictionary(self, table: str, column: str) -> List[str]:
+        key = (table, column)
+        if key not in self.dictionaries:
+            offsets = self.buffer(table, column, 'dictionary_offsets')
+            data = self.buffer(table, column, 'dictionary_data')
+            self.dictionaries[key] = [data[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+                                      for i in range(len(offsets) - 1)]
+        return self.dictionaries[key]
+
+    def decoded(self, table: str, column: str) -> np.ndarray:
+        return np.asarray(self.dictionary(table, column), dtype=object)[self.codes(table, column)]
+
+    def strings(self, table: str, column: str, start: int, stop: int) -> List[Optional[str]]:
+        offsets = self.buffer(table, column, 'offsets')[start:stop + 1].tolist()
+        blob = self.buffer(table, column, 'data')[offsets[0]:offsets[-1]].tobytes()
+        nulls = self.nulls(table, column)
+        nulls = nulls[start:stop].tolist() if nulls is not None else [0] * (stop - start)
+        base = offsets[0]
+        return [None if null else blob[a - base:b - base].decode('utf-8')
+                for a, b, null in zip(offsets, offsets[1:], nulls)]
+
+    def lists(self, table: str, column: str, start: int, stop: int) -> List[Optional[List[str]]]:
+        offsets = self.buffer(table, column, 'offsets')[start:stop + 1].tolist()
+        codes = self.codes(table, column)[offsets[0]:offsets[-1]].tolist()
+        nulls = self.nulls(table, column)
+        nulls = nulls[start:stop].tolist() if nulls is not None else [0] * (stop - start)
+        dictionary = self.dictionary(table, column)
+        base = offsets[0]
+        return [None if null else [dictionary[c] for c in codes[a - base:b - base]]
+                for a, b, null in zip(offsets, offsets[1:], nulls)]
+
+    def close(self):
+        self.dictionaries.clear()
+        try:
+            self.data.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+
+def write_analysis(path, raw_data: Dict):
+    drugs, symptoms, confounders = DictionaryEncoder(), DictionaryEncoder(), DictionaryEncoder()
+    pair_drugs, pair_symptoms, pair_offsets, drug_offsets = [], [], [0], [0]
+    numeric = {field: [] for field in NUMERIC_FIELDS}
+    integral = {field: [] for field in NUMERIC_FIELDS}
+    quotes, quote_nulls = [], []
+    confounder_codes, confounder_offsets, confounder_nulls = [], [0], []
+
+    for drug, drug_symptoms in raw_data.items():
+        drug_code = drugs.encode(drug)
+        for symptom, entries in drug_symptoms.items():
+            pair_drugs.append(drug_code)
+            pair_symptoms.append(symptoms.encode(symptom))
+            for entry in entries:
+                for field in NUMERIC_FIELDS:
+                    value = entry.get(field)
+                    integral[field].append(isinstance(value, int))
+                    numeric[field].append(np.nan if value is None else value)
+                quote = entry.get('quote')
+                quotes.append(quote or '')
+                quote_nulls.append(quote is None)
+                entry_confounders = entry.get('confounders')
+                confounder_nulls.append(not isinstance(entry_confounders, list))
+                confounder_codes.extend(confounders.encode(c) for c in entry_confounders or [] if isinstance(c, str))
+                confounder_offsets.append(len(confounder_codes))
+            pair_offsets.append(len(quotes))
+        drug_offsets.append(len(pair_drugs))
+
+    def nullable(buffers: Dict, nulls: List[bool]) -> Dict:
+        if any(nulls):
+            buffers['nulls'] = np.asarray(nulls, dtype=np.uint8)
+        return buffers
+
+    pairs = {
+        'drug': ('dictionary', {'codes': np.asarray(pair_drugs, dtype=np.int32), **drugs.buffers()}, {}),
+        'symptom': ('dictionary', {'codes': np.asarray(pair_symptoms, dtype=np.int32), **symptoms.buffers()}, {}),
+        'entry_offsets': ('int64', {'values': np.asarray(pair_offsets, dtype=np.int64)}, {}),
+    }
+    entries = {}
+    for field, values in numeric.items():
+        buffers = {'values': np.asarray(values, dtype=np.float64)}
+        ints = integral[field]
+        if any(ints) and not all(ints):
+            buffers['integral'] = np.asarray(ints, dtype=np.uint8)
+        entries[field] = ('float64', buffers, {'integral': bool(ints) and all(ints)})
+    entries['quote'] = ('string', nullable(encode_strings(quotes), quote_nulls), {})
+    entries['confounders'] = ('dictionary_list', nullable({
+        'offsets': np.asarray(confounder_offsets, dtype=np.int64),
+        'codes': np.asarray(confounder_codes, dtype=np.int32),
+        **confounders.buffers()
+    }, confounder_nulls), {})
+
+    write_tables(path, {
+        'drugs': {'rows': len(drugs.values), 'columns': {
+            'pair_offsets': ('int64', {'values': np.asarray(drug_offsets, dtype=np.int64)}, {})
+        }},
+        'pairs': {'rows': len(pair_drugs), 'columns': pairs},
+        'entries': {'rows': len(quotes), 'columns': entries}
+    }, metadata={'format': 'side_effects_analysis'})
+
+
+def read_analysis(path, fields: Iterable[str] = ENTRY_FIELDS) -> Dict:
+    table = ColumnarFile(path)
+    try:
+        fields = [f for f in ENTRY_FIELDS if f in set(fields)]
+        columns = {}
+        n_entries = table.rows('entries')
+        for field in fields:
+            if field in NUMERIC_FIELDS:
+                values = table.numeric('entries', field)
+                nulls = np.isnan(values).tolist()
+                ints = table.buffer('entries', field, 'integral')
+                if ints is None:
+                    ints = [table.spec('entries', field).get('integral')] * len(nulls)
+                else:
+                    ints = ints.tolist()
+                columns[field] = [None if null else (int(v) if as_int else v)
+                                  for v, null, as_int in zip(values.tolist(), nulls, ints)]
+            elif field == 'quote':
+                columns[field] = table.strings('entries', field, 0, n_entries)
+            else:
+                columns[field] = table.lists('entries', field, 0, n_entries)
+
+        symptoms = table.decoded('pairs', 'symptom')
+        offsets = table.numeric('pairs', 'entry_offsets').tolist()
+
+        def pair_entries(i: int) -> List[Dict]:
+            return [{field: columns[field][j] for field in fields} for j in range(offsets[i], offsets[i + 1])]
+
+        if 'drugs' not in table.header['tables']:
+            raw_data = {}
+            for i, drug in enumerate(table.decoded('pairs', 'drug')):
+                raw_data.setdefault(drug, {})[symptoms[i]] = pair_entries(i)
+            return raw_data
+
+        drug_pairs = table.numeric('drugs', 'pair_offsets').tolist()
+        return {
+            drug: {symptoms[i]: pair_entries(i) for i in range(drug_pairs[d], drug_pairs[d + 1])}
+            for d, drug in enumerate(table.dictionary('pairs', 'drug'))
+        }
+    finally:
+        table.close()
+
+
+def load_analysis(path, fields: Iterable[str] = ENTRY_FIELDS) -> Dict:
+    if is_columnar(path):
+        return read_analysis(path, fields)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ColumnarEvidence(CachedEvidence):
+    def __init__(self, path, cache_size: int = EVIDENCE_CACHE_SIZE):
+        super().__init__(cache_size)
+        self.path = path
+        self.table = ColumnarFile(path)
+
+    def load(self, offset: int, length: int) -> Dict:
+        start, stop = offset, offset + length
+        confounders = set()
+        for entry_confounders in self.table.lists('entries', 'confounders', start, stop):
+            confounders.update(entry_confounders or [])
+        return {
+            'confounders': sorted(confounders),
+            'quotes': [q for q in self.table.strings('entries', 'quote', start, stop) if q]
+        }
+
+    def close(self):
+        self.table.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert analyzer output between JSON and the Echo columnar format')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    to_columnar = subparsers.add_parser('to-columnar', help='Convert analyzer JSON to the columnar format')
+    to_columnar.add_argument('input', help='Analyzer JSON file')
+    to_columnar.add_argument('output', nargs='?', help=f'Output file (default: input with {COLUMNAR_SUFFIX} suffix)')
+
+    to_json = subparsers.add_parser('to-json', help='Convert a columnar file back to analyzer JSON')
+    to_json.add_argument('input', help='Columnar file')
+    to_json.add_argument('output', nargs='?', help='Output file (default: input with .json suffix)')
+
+    info = subparsers.add_parser('info', help='Show tables, columns and sizes of a columnar file')
+    info.add_argument('input', help='Columnar file')
+
+    args = parser.parse_args()
+
+    if args.command == 'to-columnar':
+        output = args.output or str(Path(args.input).with_suffix(COLUMNAR_SUFFIX))
+        with open(args.input, 'r', encoding='utf-8') as f:
+            write_analysis(output, json.load(f))
+        print(f"Wrote {output} ({os.path.getsize(output) / 1e6:.1f} MB, "
+              f"JSON was {os.path.getsize(args.input) / 1e6:.1f} MB)")
+    elif args.command == 'to-json':
+        output = args.output or str(Path(args.input).with_suffix('.json'))
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(read_analysis(args.input), f, indent=2, ensure_ascii=False)
+        print(f"Wrote {output}")
+    else:
+        table = ColumnarFile(args.input)
+        try:
+            for table_name, spec in table.header['tables'].items():
+                print(f"{table_name}: {spec['rows']} rows")
+                for column, column_spec in spec['columns'].items():
+                    size = sum(np.dtype(dtype).itemsize * count for _, dtype, count in column_spec['buffers'].values())
+                    print(f"  {column:<18}{column_spec['kind']:<18}{size / 1e6:>10.2f} MB")
+        finally:
+            table.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+# Confounder Matrix: Sparse confounder x drug matrix with co-occurrence, Jaccard/cosine similarity and MinHash LSH
+
+import heapq
+import sys
+from typing import List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+MERSENNE_PRIME = (1 << 31) - 1
+DEFAULT_MAX_EXACT_PAIRS = 50_000_000
+DEFAULT_BLOCK_PAIRS = 1_000_000
+METRICS = ('count', 'jaccard', 'cosine')
+
+
+class ConfounderMatrix:
+    def __init__(self, confounders: List[str], drugs: List[str], counts: sparse.csr_matrix):
+        self.confounders = confounders
+        self.drugs = drugs
+        self.counts = counts
+        self.confounder_row = {c: i for i, c in enumerate(confounders)}
+        self.drug_row = {d: i for i, d in enumerate(drugs)}
+
+    @classmethod
+    def from_index(cls, index) -> 'ConfounderMatrix':
+        confounders = sorted(index.names())
+        drug_ids = {}
+        rows, cols, values = [], [], []
+        for row, conf in enumerate(confounders):
+            for drug, _, count in index.read_postings(conf):
+                rows.append(row)
+                cols.append(drug_ids.setdefault(drug, len(drug_ids)))
+                values.append(count)
+        drugs = sorted(drug_ids, key=drug_ids.get)
+        counts = sparse.coo_matrix(
+            (np.asarray(values, dtype=np.float64), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+            shape=(len(confounders), len(drugs))
+        ).tocsr()
+        counts.sum_duplicates()
+        return cls(confounders, drugs, counts)
+
+    def view(self, axis: str) -> Tuple[List[str], sparse.csr_matrix]:
+        if axis == 'confounders':
+            return self.confounders, self.counts
+        if axis == 'drugs':
+            return self.drugs, self.counts.T.tocsr()
+        raise ValueError(f"Unknown axis: {axis}")
+
+
+def binarize(m: sparse.csr_matrix) -> sparse.csr_matrix:
+    b = m.copy()
+    b.data = np.ones_like(b.data)
+    return b
+
+
+def l2_normalize(m: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ m
+
+
+def exact_pair_cost(m: sparse.csr_matrix) -> int:
+    col_nnz = np.bincount(m.indices, minlength=m.shape[1]).astype(np.int64)
+    return int((col_nnz * (col_nnz - 1) // 2).sum())
+
+
+def upper_block(product: sparse.csr_matrix, start: int) -> sparse.coo_matrix:
+    product = product.tocsr()
+    product.sort_indices()
+    return sparse.triu(product, k=1 + start, format='coo')
+
+
+def exact_top_pairs(m: sparse.csr_matrix, metric: str, k: int, min_shared: int = 1,
+                    block_pairs: int = DEFAULT_BLOCK_PAIRS) -> List[Tuple[float, int, int, int]]:
+    b = binarize(m)
+    bt = b.T.tocsr()
+    n = l2_normalize(m) if metric == 'cosine' else None
+    nt = n.T.tocsr() if n is not None else None
+    rows = m.shape[0]
+    pairs_per_row = max(1, 2 * exact_pair_cost(m) // max(rows, 1))
+    step = max(1, block_pairs // pairs_per_row)
+
+    best = []
+    for start in range(0, rows, step):
+        stop = min(rows, start + step)
+        shared = upper_block(b[start:stop] @ bt, start)
+        keep = shared.data >= max(min_shared, 1)
+        i, j, inter = shared.row[keep] + start, shared.col[keep], shared.data[keep]
+        if not len(i):
+            continue
+        if metric == 'cosine':
+            scores = upper_block(n[start:stop] @ nt, start).data[keep]
+        else:
+            scores = pair_scores(m, i, j, inter, metric)
+        if len(scores) > k:
+            cutoff = np.partition(scores, len(scores) - k)[len(scores) - k]
+            top = scores >= cutoff
+            i, j, inter, scores = i[top], j[top], inter[top], scores[top]
+        best = heapq.nlargest(k, best + list(zip(scores.tolist(), i.tolist(), j.tolist(), inter.tolist())))
+    return best
+
+
+def minhash_signatures(m: sparse.csr_matrix, num_perm: int = 128, seed: int = 0,
+                       block_nnz: int = 1 << 20) -> np.ndarray:
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+    signatures = np.full((m.shape[0], num_perm), MERSENNE_PRIME, dtype=np.uint64)
+
+    indptr = m.indptr
+    start = 0
+    while start < m.shape[0]:
+        stop = max(start + 1, int(np.searchsorted(indptr, indptr[start] + block_nnz, side='right')) - 1)
+        stop = min(stop, m.shape[0])
+        lo, hi = indptr[start], indptr[stop]
+        if hi > lo:
+            hashed = (np.outer(m.indices[lo:hi].astype(np.uint64), a) + b) % MERSENNE_PRIME
+            offsets = indptr[start:stop] - lo
+            nonempty = np.diff(indptr[start:stop + 1]) > 0
+            mins = np.minimum.reduceat(hashed, offsets[nonempty], axis=0)
+            signatures[start:stop][nonempty] = mins
+        start = stop
+    return signatures
+
+
+def check_bands(num_perm: int, bands: int):
+    if bands <= 0 or num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a positive multiple of bands ({bands})")
+
+
+def bucket_pairs(members: np.ndarray, n: int) -> np.ndarray:
+    left, right = np.triu_indices(len(members), k=1)
+    lo = np.minimum(members[left], members[right]).astype(np.int64)
+    hi = np.maximum(members[left], members[right]).astype(np.int64)
+    return lo * n + hi
+
+
+def neighbour_pairs(signatures: np.ndarray, members: np.ndarray, n: int, window: int) -> np.ndarray:
+    members = members[np.lexsort(signatures[members].T[::-1])]
+    keys = []
+    for step in range(1, min(window, len(members) - 1) + 1):
+        lo = np.minimum(members[:-step], members[step:]).astype(np.int64)
+        hi = np.maximum(members[:-step], members[step:]).astype(np.int64)
+        keys.append(lo * n + hi)
+    return np.concatenate(keys)
+
+
+def lsh_candidates(signatures: np.ndarray, bands: int = 32, max_bucket: int = 1000,
+                   window: int = 50) -> Tuple[np.ndarray, np.ndarray]:
+    n, num_perm = signatures.shape
+    check_bands(num_perm, bands)
+    rows_per_band = num_perm // bands
+    keys = []
+    oversized = largest = 0
+    for band in range(bands):
+        chunk = np.ascontiguousarray(signatures[:, band * rows_per_band:(band + 1) * rows_per_band])
+        _, bucket = np.unique(chunk.view(np.dtype((np.void, chunk.dtype.itemsize * rows_per_band))).ravel(),
+                              return_inverse=True)
+        order = np.argsort(bucket, kind='stable')
+        boundaries = np.flatnonzero(np.diff(bucket[order])) + 1
+        for members in np.split(order, boundaries):
+            if len(members) < 2:
+                continue
+            if len(members) <= max_bucket:
+                keys.append(bucket_pairs(members, n))
+            else:
+                oversized += 1
+                largest = max(largest, len(members))
+                keys.append(neighbour_pairs(signatures, members, n, window))
+    if oversized:
+        print(f"Warning: {oversized} LSH buckets exceed {max_bucket} members (largest {largest}); "
+              f"pairing each member with its {window} nearest signatures instead of all pairs", file=sys.stderr)
+    if not keys:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    keys = np.unique(np.concatenate(keys))
+    return keys // n, keys % n
+
+
+def pair_scores(m: sparse.csr_matrix, i: np.ndarray, j: np.ndarray, inter: np.ndarray, metric: str) -> np.ndarray:
+    if metric == 'count':
+        return inter.astype(np.float64)
+    if metric == 'jaccard':
+        sizes = np.diff(m.indptr)
+        return inter / (sizes[i] + sizes[j] - inter)
+    if metric == 'cosine':
+        n = l2_normalize(m)
+        return np.asarray(n[i].multiply(n[j]).sum(axis=1)).ravel()
+    raise ValueError(f"Unknown metric: {metric}")
+
+
+def lsh_pairs(m: sparse.csr_matrix, metric: str, num_perm: int = 128, bands: int = 32, seed: int = 0):
+    check_bands(num_perm, bands)
+    i, j = lsh_candidates(minhash_signatures(m, num_perm=num_perm, seed=seed), bands=bands)
+    b = binarize(m)
+    inter = np.asarray(b[i].multiply(b[j]).sum(axis=1)).ravel()
+    keep = inter > 0
+    i, j, inter = i[keep], j[keep], inter[keep]
+    return i, j, inter, pair_scores(m, i, j, inter, metric)
+
+
+def top_pairs(labels: List[str], m: sparse.csr_matrix, k: int = 10, metric: str = 'jaccard',
+              min_shared: int = 1, method: str = 'auto', max_exact_pairs: int = DEFAULT_MAX_EXACT_PAIRS,
+              **lsh_options) -> Tuple[str, List[Tuple[float, str, str, int]]]:
+    if method == 'auto':
+        method = 'lsh' if exact_pair_cost(m) > max_exact_pairs else 'exact'
+    if method == 'exact':
+        best = exact_top_pairs(m, metric, k, min_shared)
+    else:
+        i, j, inter, scores = lsh_pairs(m, metric, **lsh_options)
+        keep = inter >= min_shared
+        best = heapq.nlargest(k, zip(scores[keep].tolist(), i[keep].tolist(), j[keep].tolist(), inter[keep].tolist()))
+    return method, [(score, labels[a], labels[b], int(shared)) for score, a, b, shared in best]
+
+
+def most_similar(labels: List[str], m: sparse.csr_matrix, row: int, k: int = 10, metric: str = 'jaccard',
+                 min_shared: int = 1) -> List[Tuple[float, str, int]]:
+    b = binarize(m)
+    inter = (b @ b[row].T).toarray().ravel()
+    others = np.flatnonzero(inter >= max(min_shared, 1))
+    others = others[others != row]
+    scores = pair_scores(m, np.full(len(others), row), others, inter[others], metric)
+    best = heapq.nlargest(k, zip(scores.tolist(), others.tolist()))
+    return [(score, labels[other], int(inter[other])) for score, other in best]
@@ -0,0 +1,73 @@
+# Data Loader: Parses and aggregates analyzer output off the GUI thread, streaming rows back in chunks
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from association_model import aggregate_frame, columnar_frame
+from columnar_store import ColumnarFile, is_columnar
+from evidence_store import EvidenceWriter, evidence_path
+
+READ_CHUNK_BYTES = 8 * 1024 * 1024
+ROWS_PER_MESSAGE = 2000
+
+
+def load_columnar(file_path: str, messages):
+    messages.put(('progress', 10, "Mapping columnar file..."))
+    table = ColumnarFile(file_path)
+    try:
+        frame = columnar_frame(table)
+    finally:
+        table.close()
+    for start in range(0, len(frame), ROWS_PER_MESSAGE):
+        messages.put(('rows', frame.iloc[start:start + ROWS_PER_MESSAGE]))
+        messages.put(('progress', 50 + 50 * min(start + ROWS_PER_MESSAGE, len(frame)) / len(frame),
+                      f"Loaded {min(start + ROWS_PER_MESSAGE, len(frame))} / {len(frame)} associations"))
+    messages.put(('done', str(file_path)))
+
+
+def load_worker(file_path: str, messages):
+    evidence = None
+    try:
+        if is_columnar(file_path):
+            load_columnar(file_path, messages)
+            return
+
+        size = os.path.getsize(file_path)
+        buf = bytearray(size)
+        view = memoryview(buf)
+        read = 0
+        with open(file_path, 'rb') as f:
+            while read < size:
+                n = f.readinto(view[read:read + READ_CHUNK_BYTES])
+                if not n:
+                    break
+                read += n
+                messages.put(('progress', 40 * read / size, f"Reading {read / 1e6:.0f} / {size / 1e6:.0f} MB"))
+        view.release()
+        del buf[read:]
+
+        messages.put(('progress', 40, "Parsing JSON..."))
+        raw_data = json.loads(buf)
+        del buf
+
+        try:
+            evidence = EvidenceWriter(evidence_path(file_path), source=file_path)
+        except OSError:
+            evidence = EvidenceWriter(Path(tempfile.gettempdir()) / evidence_path(file_path).name, source=file_path)
+        pending = []
+        for done, (drug, symptoms) in enumerate(raw_data.items(), 1):
+            pending.extend((drug, symptom, entries) for symptom, entries in symptoms.items())
+            if len(pending) >= ROWS_PER_MESSAGE:
+                messages.put(('rows', aggregate_frame(pending, evidence)))
+                pending = []
+            messages.put(('progress', 50 + 50 * done / len(raw_data), f"Aggregating {done} / {len(raw_data)} drugs"))
+        if pending:
+            messages.put(('rows', aggregate_frame(pending, evidence)))
+        evidence.close()
+        messages.put(('done', str(evidence.path)))
+    except Exception as e:
+        if evidence:
+            evidence.abort()
+        messages.put(('error', str(e)))
@@ -2,10 +2,30 @@
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import json
-import pandas as pd
-from collections import defaultdict
-import re
+import multiprocessing
+import queue
+import numpy as np
+
+from association_model import AssociationModel
+from data_loader import load_worker
+from evidence_store import open_evidence
+from hypothesis_generator import load_cached_report
+from search_index import AssociationSearchIndex
+
+ROW_HEIGHT = 40
+VIRTUAL_OVERSCAN = 2
+SEARCH_DEBOUNCE_MS = 150
+LOAD_POLL_MS = 50
+LOAD_MESSAGES_PER_POLL = 20
+
+SORT_COLUMNS = {
+    'Drug': 'drug',
+    'Symptom': 'symptom',
+    'Temporal': 'avg_temporal',
+    'Confidence': 'avg_confidence',
+    'Community': 'avg_community',
+    'Novelty Score': 'novelty_score'
+}
 
 class PharmcovigilanceInterface:
     def __init__(self, root):
@@ -26,11 +46,22 @@ class PharmcovigilanceInterface:
         
         self.setup_styles()
         
-        self.raw_data = {}
-        self.processed_data = []
-        self.filtered_data = []
+        self.data_path = None
+        self.model = AssociationModel()
+        self.view_rows = np.arange(0)
+        self.search_index = None
+        self.search_matches = None
+        self.evidence = None
+        self.search_job = None
+        self.loader = None
+        self.loader_messages = None
+        self.previous_state = None
         self.sort_column = None
         self.sort_reverse = False
+        self.view_offset = 0
+        self.selected_row = None
+        self.row_items = []
+        self.rendered_rows = []
         
         self.create_interface()
         
@@ -61,7 +92,7 @@ class PharmcovigilanceInterface:
                        fieldbackground='white',
                        borderwidth=0,
                        font=('Inter', 13),
-                       rowheight=40)
+                       rowheight=ROW_HEIGHT)
         
         style.configure('Data.Treeview.Heading',
                        background=self.colors['terracotta'],
@@ -100,7 +131,7 @@ class PharmcovigilanceInterface:
         control_frame = tk.Frame(self.root, bg=self.colors['cream'], pady=20)
         control_frame.pack(fill='x', padx=40)
         
-        load_button = tk.Button(control_frame, 
+        self.load_button = load_button = tk.Button(control_frame, 
                                text="📁 Load JSON Data", 
                                command=self.load_data, 
                                bg=self.colors['orange'], 
@@ -154,6 +185,26 @@ class PharmcovigilanceInterface:
                                 activeforeground='white')
         clear_button.pack(side='left')
         
+        self.load_frame = tk.Frame(control_frame, bg=self.colors['cream'])
+        
+        self.load_progress = ttk.Progressbar(self.load_frame, orient='horizontal', length=200,
+                                             mode='determinate', maximum=100)
+        self.load_progress.pack(side='left', padx=(0, 10))
+        
+        cancel_button = tk.Button(self.load_frame, 
+                                  text="✕ Cancel", 
+                                  command=self.cancel_load,
+                                  bg=self.colors['sage'], 
+                                  fg=self.colors['dark_gray'], 
+                                  relief='flat',
+                                  font=('Inter', 12, 'bold'), 
+                                  padx=20, 
+                                  pady=10,
+                                  borderwidth=0,
+                                  activebackground=self.colors['terracotta'], 
+                                  activeforeground='white')
+        cancel_button.pack(side='left')
+        
         self.results_label = tk.Label(control_frame, 
                                      text="No data loaded", 
                                      background=self.colors['cream'], 
@@ -196,26 +247,26 @@ class PharmcovigilanceInterface:
         column_widths = {
             'Drug': 200, 
             'Symptom': 250, 
-            'Avg Temporal': 140,
-            'Avg Confidence': 150, 
-            'Avg Community': 150,
+            'Temporal': 140,
+            'Confidence': 150, 
+            'Community': 150,
             'Novelty Score': 140,
-            'Analyzer Report': 160, 
-            'Proposer Report': 160
+            'Analyze': 160, 
+            'Proposer': 160
         }
         
-        self.numerical_columns = {'Avg Temporal', 'Avg Confidence', 'Avg Community', 'Novelty Score'}
-        
         for col in columns:
             self.tree.heading(col, text=col, anchor='center', 
                             command=lambda c=col: self.sort_by_column(c))
             self.tree.column(col, width=column_widths.get(col, 140), 
                            anchor='center', minwidth=120)
         
-        v_scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
+        self.v_scrollbar = v_scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.on_table_scroll)
         h_scrollbar = ttk.Scrollbar(table_frame, orient='horizontal', command=self.tree.xview)
         
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.tree.tag_configure('evenrow', background='#FEFEFE')
+        self.tree.tag_configure('oddrow', background='#F8FAFC')
         
         self.tree.grid(row=0, column=0, sticky='nsew', padx=2, pady=2)
         v_scrollbar.grid(row=0, column=1, sticky='ns', padx=(0, 2), pady=2)
@@ -225,9 +276,18 @@ class PharmcovigilanceInterface:
         table_frame.grid_columnconfigure(0, weight=1)
         
         self.tree.bind('<Double-1>', self.on_cell_double_click)
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        self.tree.bind('<Configure>', lambda event: self.render_window())
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_rows(-1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_rows(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_rows(1, 'units'))
+        self.tree.bind('<Up>', lambda event: self.move_selection(-1))
+        self.tree.bind('<Down>', lambda event: self.move_selection(1))
+        self.tree.bind('<Prior>', lambda event: self.scroll_rows(-1, 'pages'))
+        self.tree.bind('<Next>', lambda event: self.scroll_rows(1, 'pages'))
         
     def sort_by_column(self, column):
-        if not self.filtered_data:
+        if column not in SORT_COLUMNS or not len(self.view_rows) or self.loader is not None:
             return
             
         if self.sort_column == column:
@@ -236,96 +296,154 @@ class PharmcovigilanceInterface:
             self.sort_reverse = False
             
         self.sort_column = column
-        
-        column_map = {
-            'Drug': 'drug',
-            'Symptom': 'symptom',
-            'Avg Temporal': 'avg_temporal',
-            'Avg Confidence': 'avg_confidence',
-            'Avg Community': 'avg_community',
-            'Novelty Score': 'novelty_score'
-        }
-        
-        if column in column_map:
-            key = column_map[column]
-            
-            if column in self.numerical_columns:
-                self.filtered_data.sort(key=lambda x: x[key], reverse=self.sort_reverse)
+        self.refresh_view()
+        self.update_sort_headings()
+        
+    def update_sort_headings(self):
+        for col in SORT_COLUMNS:
+            if col == self.sort_column:
+                direction = " ▼" if self.sort_reverse else " ▲"
+                self.tree.heading(col, text=col + direction)
             else:
-                self.filtered_data.sort(key=lambda x: x[key].lower(), reverse=self.sort_reverse)
+                self.tree.heading(col, text=col)
                 
-            self.populate_table()
-            
-            for col in ['Drug', 'Symptom', 'Avg Temporal', 'Avg Confidence', 'Avg Community', 'Novelty Score']:
-                if col == column:
-                    direction = " ▼" if self.sort_reverse else " ▲"
-                    self.tree.heading(col, text=col + direction)
-                else:
-                    self.tree.heading(col, text=col)
+    def refresh_view(self):
+        self.view_rows = self.model.view(SORT_COLUMNS.get(self.sort_column), self.sort_reverse, self.search_matches)
+        self.populate_table()
         
     def load_data(self):
+        if self.loader is not None:
+            return
+            
         file_path = filedialog.askopenfilename(
             title="Select JSON Data File",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("Analysis files", "*.json *.echocol"), ("JSON files", "*.json"),
+                       ("Echo columnar files", "*.echocol"), ("All files", "*.*")]
         )
         
         if not file_path:
             return
             
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.raw_data = json.load(f)
+        self.previous_state = (self.data_path, self.model, self.view_rows, self.search_index, self.search_matches)
+        self.data_path = file_path
+        self.model = AssociationModel()
+        self.view_rows = np.arange(0)
+        self.search_index = None
+        self.search_matches = None
+        self.populate_table()
+        
+        context = multiprocessing.get_context('spawn')
+        self.loader_messages = context.Queue()
+        self.loader = context.Process(target=load_worker, args=(file_path, self.loader_messages), daemon=True)
+        self.loader.start()
+        
+        self.load_button.config(state='disabled')
+        self.load_progress['value'] = 0
+        self.load_frame.pack(side='right', padx=(20, 0))
+        self.status_var.set(f"⏳ Loading {file_path}...")
+        self.root.after(LOAD_POLL_MS, self.poll_loader)
+        
+    def poll_loader(self):
+        if self.loader is None:
+            return
+            
+        received_rows = False
+        for _ in range(LOAD_MESSAGES_PER_POLL):
+            try:
+                kind, *payload = self.loader_messages.get_nowait()
+            except queue.Empty:
+                break
+                
+            if kind == 'progress':
+                self.load_progress['value'], text = payload
+                self.status_var.set(f"⏳ {text}")
+            elif kind == 'rows':
+                self.model.append(payload[0])
+                received_rows = True
+            elif kind == 'done':
+                self.finish_load(evidence_file=payload[0])
+                return
+            elif kind == 'error':
+                self.finish_load(error=payload[0])
+                return
+                
+        if received_rows:
+            self.view_rows = np.arange(len(self.model))
+            self.render_window()
+            self.update_results_count()
+            
+        if not self.loader.is_alive() and self.loader_messages.empty():
+            self.finish_load(error="Loader process exited unexpectedly")
+            return
             
-            self.process_data()
+        self.root.after(LOAD_POLL_MS, self.poll_loader)
+        
+    def finish_load(self, error=None, cancelled=False, evidence_file=None):
+        if self.loader.is_alive():
+            self.loader.terminate()
+        self.loader.join()
+        self.loader = None
+        self.loader_messages = None
+        self.load_frame.pack_forget()
+        self.load_button.config(state='normal')
+        
+        if error or cancelled:
+            self.data_path, self.model, self.view_rows, self.search_index, self.search_matches = self.previous_state
+            self.previous_state = None
             self.populate_table()
-            self.status_var.set(f"✅ Loaded {len(self.processed_data)} drug-symptom associations")
+            if cancelled:
+                self.status_var.set("Loading cancelled")
+            else:
+                self.status_var.set("Ready - Load JSON data to begin analysis")
+                messagebox.showerror("Error", f"Failed to load data: {error}")
+            return
             
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load data: {str(e)}")
+        self.previous_state = None
+        if self.evidence:
+            self.evidence.close()
+        self.evidence = open_evidence(evidence_file)
+        self.sort_column = None
+        self.sort_reverse = False
+        self.update_sort_headings()
+        self.search_index = AssociationSearchIndex(self.model.frame)
+        self.apply_search()
+        self.status_var.set(f"✅ Loaded {len(self.model)} drug-symptom associations")
+        
+    def cancel_load(self):
+        if self.loader is not None:
+            self.finish_load(cancelled=True)
             
-    def process_data(self):
-        self.processed_data = []
-        
-        for drug, symptoms in self.raw_data.items():
-            for symptom, entries in symptoms.items():
-                if symptom == 'null':
-                    continue
-                    
-                if entries:
-                    avg_temporal = sum(entry.get('temporal_weight', 0) for entry in entries) / len(entries)
-                    avg_confidence = sum(entry.get('confidence', 0) for entry in entries) / len(entries)
-                    avg_community = sum(entry.get('community_metric', 0) for entry in entries) / len(entries)
-                    
-                    novelty_score = (avg_temporal + avg_confidence + avg_community) / 3
-                    
-                    all_confounders = []
-                    all_quotes = []
-                    
-                    for entry in entries:
-                        all_confounders.extend(entry.get('confounders', []))
-                        if entry.get('quote'):
-                            all_quotes.append(entry['quote'])
-                    
-                    self.processed_data.append({
-                        'drug': drug,
-                        'symptom': symptom,
-                        'avg_temporal': round(avg_temporal, 3),
-                        'avg_confidence': round(avg_confidence, 3),
-                        'avg_community': round(avg_community, 3),
-                        'novelty_score': round(novelty_score, 3),
-                        'confounders': list(set(all_confounders)),
-                        'quotes': all_quotes,
-                        'raw_entries': entries
-                    })
-        
-        self.processed_data.sort(key=lambda x: x['novelty_score'], reverse=True)
-        self.filtered_data = self.processed_data.copy()
+    def visible_row_count(self):
+        height = self.tree.winfo_height()
+        header = 0
+        if self.row_items:
+            bbox = self.tree.bbox(self.row_items[0])
+            if bbox:
+                header = bbox[1]
+        return max(1, (height - header) // ROW_HEIGHT)
         
     def populate_table(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.view_offset = 0
+        self.selected_row = None
+        self.render_window()
+        self.update_results_count()
         
-        for i, row in enumerate(self.filtered_data):
+    def render_window(self):
+        visible = self.visible_row_count()
+        total = len(self.view_rows)
+        self.view_offset = max(0, min(self.view_offset, total - visible))
+        pool_size = min(visible + VIRTUAL_OVERSCAN, total - self.view_offset)
+        
+        while len(self.row_items) < pool_size:
+            self.row_items.append(self.tree.insert('', 'end'))
+            self.rendered_rows.append(None)
+        while len(self.row_items) > pool_size:
+            self.tree.delete(self.row_items.pop())
+            self.rendered_rows.pop()
+        
+        for slot, item in enumerate(self.row_items):
+            i = self.view_offset + slot
+            row = self.model.row(self.view_rows[i])
             values = (
                 row['drug'],
                 row['symptom'],
@@ -336,35 +454,74 @@ class PharmcovigilanceInterface:
                 "📊 Analysis",
                 "📋 Report"
             )
-            
             tags = ('evenrow',) if i % 2 == 0 else ('oddrow',)
-            self.tree.insert('', 'end', values=values, tags=tags)
-        
-        self.tree.tag_configure('evenrow', background='#FEFEFE')
-        self.tree.tag_configure('oddrow', background='#F8FAFC')
-        
-        self.update_results_count()
+            if self.rendered_rows[slot] != (values, tags):
+                self.tree.item(item, values=values, tags=tags)
+                self.rendered_rows[slot] = (values, tags)
+        
+        selection = self.tree.selection()
+        slot = None if self.selected_row is None else self.selected_row - self.view_offset
+        if slot is not None and 0 <= slot < len(self.row_items):
+            if selection != (self.row_items[slot],):
+                self.tree.selection_set(self.row_items[slot])
+        elif selection:
+            self.tree.selection_remove(selection)
+        
+        self.tree.yview_moveto(0)
+        if total:
+            self.v_scrollbar.set(self.view_offset / total, min(1.0, (self.view_offset + visible) / total))
+        else:
+            self.v_scrollbar.set(0, 1)
+        
+    def on_table_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.view_offset = int(float(amount) * len(self.view_rows))
+            self.render_window()
+        elif action == 'scroll':
+            self.scroll_rows(int(amount), unit)
+            
+    def scroll_rows(self, amount, unit):
+        step = self.visible_row_count() if unit == 'pages' else 1
+        self.view_offset += amount * step
+        self.render_window()
+        return 'break'
+        
+    def move_selection(self, direction):
+        if self.selected_row is None:
+            return None
+        self.selected_row = max(0, min(self.selected_row + direction, len(self.view_rows) - 1))
+        visible = self.visible_row_count()
+        if self.selected_row < self.view_offset:
+            self.view_offset = self.selected_row
+        elif self.selected_row >= self.view_offset + visible:
+            self.view_offset = self.selected_row - visible + 1
+        self.render_window()
+        self.tree.focus(self.row_items[self.selected_row - self.view_offset])
+        return 'break'
+        
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self.row_items:
+            self.selected_row = self.view_offset + self.row_items.index(selection[0])
         
     def on_search(self, *args):
-        search_term = self.search_var.get().lower().strip()
-        
-        if not search_term:
-            self.filtered_data = self.processed_data.copy()
-        else:
-            self.filtered_data = [
-                row for row in self.processed_data
-                if (search_term in row['drug'].lower() or 
-                    search_term in row['symptom'].lower())
-            ]
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
         
-        self.populate_table()
+    def apply_search(self):
+        self.search_job = None
+        if self.loader is not None:
+            return
+        self.search_matches = self.search_index.search(self.search_var.get()) if self.search_index else None
+        self.refresh_view()
         
     def clear_search(self):
         self.search_var.set("")
         
     def update_results_count(self):
-        total = len(self.processed_data)
-        filtered = len(self.filtered_data)
+        total = len(self.model)
+        filtered = len(self.view_rows)
         
         if total == 0:
             self.results_label.config(text="No data loaded")
@@ -383,14 +540,17 @@ class PharmcovigilanceInterface:
         return button
             
     def on_cell_double_click(self, event):
+        if self.loader is not None or not self.tree.selection():
+            return
         item = self.tree.selection()[0]
         column = self.tree.identify_column(event.x)
         
-        row_index = self.tree.index(item)
-        if row_index >= len(self.filtered_data):
+        row_index = self.view_offset + self.tree.index(item)
+        if row_index >= len(self.view_rows):
             return
             
-        row_data = self.filtered_data[row_index]
+        row_data = self.model.row(self.view_rows[row_index])
+        row_data.update(self.evidence.get(row_data['evidence_offset'], row_data['evidence_length']))
         
         if column == '#7':
             self.show_analyzer_report(row_data)
@@ -431,7 +591,7 @@ class PharmcovigilanceInterface:
 Confidence Score: {row_data['avg_confidence']:.3f}
 Community Metric: {row_data['avg_community']:.3f}
 Novelty Score: {row_data['novelty_score']:.3f}
-Number of Reports: {len(row_data['raw_entries'])}"""
+Number of Reports: {row_data['n_reports']}"""
         
         metrics_label = tk.Label(metrics_card, text=metrics_text, 
                                 font=('Inter', 14),
@@ -522,15 +682,13 @@ Number of Reports: {len(row_data['raw_entries'])}"""
         content_frame = tk.Frame(popup, bg='white', padx=40, pady=30)
         content_frame.pack(fill='both', expand=True)
         
-        dummy_report = f"""
-DRUG-INDUCED SYMPTOM ANALYSIS
-
-PRIMARY HYPOTHESIS: NEUROINFLAMMATORY CASCADE
-The compound may accumulate in brain regions critical for affected neural pathways. The drug's known propensity to cause peripheral effects through inflammatory cascades may extend to the central nervous system. Neuroinflammation in relevant brain networks could disrupt neural circuits responsible for the observed symptom pattern. This mechanism is supported by the drug's documented ability to cross physiological barriers and cause systemic effects.
-
-SECONDARY HYPOTHESIS: CELLULAR DYSFUNCTION PATHWAY
-The therapeutic agent may contribute to symptom manifestation through oxidative stress and mitochondrial dysfunction in target neurons. The drug's interference with cellular energy metabolism could preferentially affect high-energy-demand regions involved in the affected physiological processes, leading to the observed clinical presentation. This aligns with existing literature showing similar therapeutic classes can cause persistent effects affecting related biological systems.
-"""
+        report = None
+        if self.data_path:
+            report = load_cached_report(self.data_path, row_data['drug'], row_data['symptom'], row_data['quotes'])
+        if report is None:
+            report = ("No precomputed report for this association.\n\n"
+                      "Run hypothesis_generator.py --file <analysis JSON> to generate reports for the top-ranked "
+                      "pairs; reports are refreshed whenever their supporting quotes change.")
         
         text_widget = tk.Text(content_frame, font=('Inter', 13),
                              bg=self.colors['cream'], wrap='word', 
@@ -539,7 +697,7 @@ The therapeutic agent may contribute to symptom manifestation through oxidative
                              selectbackground=self.colors['orange'],
                              selectforeground='white',
                              fg=self.colors['dark_gray'])
-        text_widget.insert('1.0', dummy_report.strip())
+        text_widget.insert('1.0', report.strip())
         text_widget.config(state='disabled')
         text_widget.pack(fill='both', expand=True)
         
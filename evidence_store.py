@@ -0,0 +1,149 @@
+# Evidence Store: Sidecar file of per-association quotes and confounders, read on demand through mmap
+
+import io
+import json
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+EVIDENCE_CACHE_SIZE = 64
+
+
+def evidence_path(analysis_file) -> Path:
+    path = Path(analysis_file)
+    return path.with_name(f"{path.stem}.evidence.jsonl")
+
+
+def is_fresh(path: Path, source) -> bool:
+    try:
+        return path.stat().st_mtime >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+class EvidenceWriter:
+    def __init__(self, path=None, source=None):
+        self.path = Path(path) if path else None
+        self.tmp_path = None
+        self.file = None
+        self.existing = None
+        self.offset = 0
+        self.data = None
+        if self.path is None:
+            self.file = io.BytesIO()
+        elif source is not None and is_fresh(self.path, source):
+            self.existing = EvidenceStore(self.path)
+        else:
+            self.start_file()
+
+    def start_file(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name + '.', suffix='.tmp')
+        self.tmp_path = Path(tmp_path)
+        self.file = os.fdopen(fd, 'wb')
+
+    def diverge(self):
+        prefix = self.existing.data[:self.offset]
+        self.existing.close()
+        self.existing = None
+        self.start_file()
+        self.file.write(prefix)
+
+    def add(self, entries: List[Dict]) -> Tuple[int, int]:
+        confounders = set()
+        quotes = []
+        for entry in entries:
+            confounders.update(entry.get('confounders') or [])
+            if entry.get('quote'):
+                quotes.append(entry['quote'])
+        record = json.dumps({'confounders': sorted(confounders), 'quotes': quotes},
+                            ensure_ascii=False).encode('utf-8') + b'\n'
+        if self.existing is not None and self.existing.data[self.offset:self.offset + len(record)] != record:
+            self.diverge()
+        if self.file is not None:
+            self.file.write(record)
+        offset = self.offset
+        self.offset += len(record)
+        return offset, len(record) - 1
+
+    def close(self):
+        if self.path is None:
+            self.data = self.file.getvalue()
+            self.file.close()
+            return
+        if self.existing is not None:
+            if self.offset == len(self.existing.data):
+                self.existing.close()
+                self.existing = None
+                return
+            self.diverge()
+        self.file.close()
+        try:
+            os.replace(self.tmp_path, self.path)
+        except OSError:
+            self.path = self.tmp_path
+
+    def open_store(self) -> 'EvidenceStore':
+        return EvidenceStore(self.path) if self.path is not None else EvidenceStore(data=self.data)
+
+    def abort(self):
+        if self.existing is not None:
+            self.existing.close()
+        if self.file is not None:
+            self.file.close()
+        if self.tmp_path and self.tmp_path.exists():
+            self.tmp_path.unlink()
+
+
+class CachedEvidence:
+    def __init__(self, cache_size: int = EVIDENCE_CACHE_SIZE):
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+
+    def load(self, offset: int, length: int) -> Dict:
+        raise NotImplementedError
+
+    def get(self, offset: int, length: int) -> Dict:
+        key = int(offset)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        record = self.load(key, int(length))
+        with self.lock:
+            self.cache[key] = record
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return record
+
+
+class EvidenceStore(CachedEvidence):
+    def __init__(self, path=None, data: Optional[bytes] = None, cache_size: int = EVIDENCE_CACHE_SIZE):
+        super().__init__(cache_size)
+        self.path = path
+        self.file = None
+        if path is not None:
+            self.file = open(path, 'rb')
+            size = os.fstat(self.file.fileno()).st_size
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        else:
+            self.data = data or b''
+
+    def load(self, offset: int, length: int) -> Dict:
+        return json.loads(self.data[offset:offset + length])
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        if self.file:
+            self.file.close()
+
+
+def open_evidence(path):
+    from columnar_store import ColumnarEvidence, is_columnar
+
+    return ColumnarEvidence(path) if is_columnar(path) else EvidenceStore(path)
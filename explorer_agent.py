@@ -8,6 +8,8 @@ from typing import List, Dict
 import time
 import re
 
+from instrumentation import configure_from_env, inc, timed, timer
+
 ONCOLOGY_DRUGS = [
     'keytruda', 'pembrolizumab', 'opdivo', 'nivolumab', 'tecentriq', 'atezolizumab',
     'yervoy', 'ipilimumab', 'imfinzi', 'durvalumab', 'bavencio', 'avelumab',
@@ -38,6 +40,12 @@ CANCER_SUBREDDITS = [
     'AskDocs', 'medical_advice'
 ]
 
+SYMPTOM_WORDS = [
+    'fatigue', 'tired', 'nausea', 'vomiting', 'rash', 'pain',
+    'diarrhea', 'fever', 'headache', 'neuropathy', 'tingling',
+    'numbness', 'hair loss', 'weight', 'appetite', 'taste'
+]
+
 OUTPUT_DIR = "reddit_data"
 
 class SimpleRedditScraper:
@@ -57,6 +65,7 @@ class SimpleRedditScraper:
         text_lower = text.lower()
         return any(drug in text_lower for drug in ONCOLOGY_DRUGS)
     
+    @timed('explorer_fetch_seconds', kind='post')
     def scrape_post(self, post_url: str = None, post_id: str = None) -> Dict:
         try:
             if post_url:
@@ -117,9 +126,16 @@ class SimpleRedditScraper:
         else:
             posts = subreddit.hot(limit=limit)
         
-        for submission in posts:
+        posts = iter(posts)
+        while True:
+            with timer('explorer_fetch_seconds', kind='listing'):
+                submission = next(posts, None)
+            if submission is None:
+                break
+            inc('explorer_posts_scanned_total', subreddit=subreddit_name)
             full_text = submission.title + " " + submission.selftext
             if self.contains_drug_mention(full_text):
+                inc('explorer_posts_matched_total', subreddit=subreddit_name)
                 print(f"  Processing: {submission.title[:60]}...")
                 
                 post_data = {
@@ -136,8 +152,10 @@ class SimpleRedditScraper:
                 }
                 
                 if submission.num_comments > 0:
-                    submission.comments.replace_more(limit=0)
-                    for comment in submission.comments.list()[:50]:
+                    with timer('explorer_fetch_seconds', kind='comments'):
+                        submission.comments.replace_more(limit=0)
+                        comments = submission.comments.list()[:50]
+                    for comment in comments:
                         if comment.body and comment.body != '[deleted]':
                             if self.contains_drug_mention(comment.body):
                                 comment_data = {
@@ -155,7 +173,7 @@ class SimpleRedditScraper:
         print(f"  Found {len(posts_data)} posts with drug mentions")
         return posts_data
 
-def simple_extraction(post_data: Dict) -> Dict:
+def extract_pairs(post_data: Dict) -> List[Dict]:
     extractions = []
     
     full_text = post_data['title'] + " " + post_data['text']
@@ -172,18 +190,16 @@ def simple_extraction(post_data: Dict) -> Dict:
     ]
     
     community_metric = post_data.get("score", 0) + post_data.get("num_comments", 0)
+    sentences = None
     
     for drug in ONCOLOGY_DRUGS:
         if drug in full_text_lower:
-            sentences = re.split(r'[.!?]', full_text)
-            for sentence in sentences:
-                if drug in sentence.lower():
-                    symptom_words = ['fatigue', 'tired', 'nausea', 'vomiting', 'rash', 'pain', 
-                                   'diarrhea', 'fever', 'headache', 'neuropathy', 'tingling',
-                                   'numbness', 'hair loss', 'weight', 'appetite', 'taste']
-                    
-                    for symptom in symptom_words:
-                        if symptom in sentence.lower():
+            if sentences is None:
+                sentences = [(sentence, sentence.lower()) for sentence in re.split(r'[.!?]', full_text)]
+            for sentence, sentence_lower in sentences:
+                if drug in sentence_lower:
+                    for symptom in SYMPTOM_WORDS:
+                        if symptom in sentence_lower:
                             extractions.append({
                                 "drug": drug,
                                 "drug_canonical": drug,
@@ -197,6 +213,12 @@ def simple_extraction(post_data: Dict) -> Dict:
                                 "community_metric": community_metric
                             })
     
+    return extractions
+
+@timed('explorer_extraction_seconds')
+def simple_extraction(post_data: Dict) -> Dict:
+    extractions = extract_pairs(post_data)
+    
     json_path = os.path.join(OUTPUT_DIR, f"{post_data['id']}.json")
     save_data = {
         "post_id": post_data['id'],
@@ -208,8 +230,9 @@ def simple_extraction(post_data: Dict) -> Dict:
         "analyzed_at": datetime.now().isoformat()
     }
     
-    with open(json_path, 'w', encoding='utf-8') as f:
+    with timer('explorer_write_seconds'), open(json_path, 'w', encoding='utf-8') as f:
         json.dump(save_data, f, indent=2)
+    inc('explorer_extractions_total', len(extractions))
     
     return {
         "extractions": extractions,
@@ -263,4 +286,5 @@ def main():
     print(f"   - Total extractions: {total_extractions}")
 
 if __name__ == "__main__":
+    configure_from_env()
     main()
\ No newline at end of file
@@ -0,0 +1,220 @@
+# Hypothesis Generator: Batched, cached Proposer reports for ranked drug-symptom pairs
+
+import argparse
+import hashlib
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from columnar_store import load_analysis
+
+MAX_PROMPT_QUOTES = 20
+
+PROMPT_TEMPLATE = """You are the Proposer agent of a pharmacovigilance system.
+Patients on {drug} report {symptom}. Propose up to two mechanistic hypotheses that could explain this
+association, noting which confounders could instead explain it and what evidence would discriminate them.
+
+Patient quotes:
+{quotes}
+
+Reported confounders: {confounders}
+
+Literature:
+{literature}
+"""
+
+
+def hypothesis_cache_path(analysis_file):
+    path = Path(analysis_file)
+    return path.with_name(f"{path.stem}.hypotheses.sqlite")
+
+
+def evidence_hash(quotes: Iterable[str]) -> str:
+    digest = hashlib.sha256()
+    for quote in sorted(quotes):
+        digest.update(quote.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class HypothesisCache:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                drug TEXT NOT NULL,
+                symptom TEXT NOT NULL,
+                evidence_hash TEXT NOT NULL,
+                report TEXT NOT NULL,
+                model TEXT,
+                created_at TEXT,
+                PRIMARY KEY (drug, symptom)
+            )
+        """)
+
+    def get(self, drug: str, symptom: str, digest: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT report FROM reports WHERE drug = ? AND symptom = ? AND evidence_hash = ?",
+            (drug, symptom, digest)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, rows: List[Tuple[str, str, str, str, str]]):
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?)",
+                [row + (now,) for row in rows]
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def load_cached_report(analysis_file, drug: str, symptom: str, quotes: Iterable[str]) -> Optional[str]:
+    path = hypothesis_cache_path(analysis_file)
+    if not path.exists():
+        return None
+    cache = HypothesisCache(path)
+    try:
+        return cache.get(drug, symptom, evidence_hash(quotes))
+    finally:
+        cache.close()
+
+
+class StubBackend:
+    name = 'stub'
+
+    def generate(self, prompt: str) -> str:
+        header = prompt.splitlines()[1]
+        return f"[stub report]\n{header}\nPrompt digest: {hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]}"
+
+
+class HTTPBackend:
+    def __init__(self, endpoint: str, model: Optional[str] = None, timeout: float = 120.0):
+        import requests
+        self.session = requests.Session()
+        self.endpoint = endpoint
+        self.model = model
+        self.timeout = timeout
+        self.name = model or endpoint
+
+    def generate(self, prompt: str) -> str:
+        payload = {'prompt': prompt}
+        if self.model:
+            payload['model'] = self.model
+        response = self.session.post(self.endpoint, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['text']
+
+
+def ranked_pairs(data: Dict) -> List[Dict]:
+    pairs = []
+    for drug, symptoms in data.items():
+        for symptom, entries in symptoms.items():
+            if symptom == 'null' or not entries:
+                continue
+            n = len(entries)
+            novelty = sum(
+                (e.get('temporal_weight') or 0) + (e.get('confidence') or 0) + (e.get('community_metric') or 0)
+                for e in entries
+            ) / (3 * n)
+            confounders = sorted({c for e in entries if isinstance(e.get('confounders'), list)
+                                  for c in e['confounders'] if isinstance(c, str)})
+            pairs.append({
+                'drug': drug,
+                'symptom': symptom,
+                'novelty_score': novelty,
+                'quotes': [e['quote'] for e in entries if e.get('quote')],
+                'confounders': confounders
+            })
+    pairs.sort(key=lambda p: p['novelty_score'], reverse=True)
+    return pairs
+
+
+def build_prompt(pair: Dict, literature=None) -> str:
+    abstracts = literature.search(pair['drug'], pair['symptom'], k=3) if literature else []
+    return PROMPT_TEMPLATE.format(
+        drug=pair['drug'],
+        symptom=pair['symptom'],
+        quotes='\n'.join(f"- {q}" for q in pair['quotes'][:MAX_PROMPT_QUOTES]) or '- none',
+        confounders=', '.join(pair['confounders']) or 'none',
+        literature='\n'.join(f"- PMID {a['pmid']}: {a['title']}" for a in abstracts) or '- none'
+    )
+
+
+def generate_reports(pairs: List[Dict], backend, cache: HypothesisCache, batch_size: int = 32,
+                     concurrency: int = 4, literature=None) -> Dict[str, int]:
+    stats = {'cached': 0, 'generated': 0, 'failed': 0}
+    pending = []
+    for pair in pairs:
+        pair['evidence_hash'] = evidence_hash(pair['quotes'])
+        if cache.get(pair['drug'], pair['symptom'], pair['evidence_hash']) is None:
+            pending.append(pair)
+        else:
+            stats['cached'] += 1
+    print(f"{stats['cached']} reports cached, generating {len(pending)}")
+
+    def run(pair):
+        try:
+            return pair, backend.generate(build_prompt(pair, literature))
+        except Exception as e:
+            print(f"  Error generating {pair['drug']} / {pair['symptom']}: {e}")
+            return pair, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            rows = []
+            for pair, report in pool.map(run, batch):
+                if report is None:
+                    stats['failed'] += 1
+                    continue
+                rows.append((pair['drug'], pair['symptom'], pair['evidence_hash'], report, backend.name))
+            cache.put_many(rows)
+            stats['generated'] += len(rows)
+            print(f"  Batch {start // batch_size + 1}: {len(rows)}/{len(batch)} reports stored")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute Proposer hypothesis reports for ranked drug-symptom pairs')
+    parser.add_argument('--file', required=True, help='Path to the analyzer JSON file')
+    parser.add_argument('--top', type=int, default=100, help='Number of top-ranked pairs to cover (default: 100)')
+    parser.add_argument('--backend', choices=('stub', 'http'), default='stub', help='Model backend (default: stub)')
+    parser.add_argument('--endpoint', help='URL accepting {"prompt", "model"} and returning {"text"} (http backend)')
+    parser.add_argument('--model', help='Model name passed to the http backend')
+    parser.add_argument('--batch-size', type=int, default=32, help='Pairs per batch (default: 32)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent model requests (default: 4)')
+    parser.add_argument('--literature-index', help='Literature index directory to add supporting abstracts')
+    parser.add_argument('--cache', help='Cache path (default: <analysis>.hypotheses.sqlite)')
+    args = parser.parse_args()
+
+    if args.backend == 'http' and not args.endpoint:
+        print("Error: --endpoint is required for the http backend")
+        return 1
+    backend = HTTPBackend(args.endpoint, args.model) if args.backend == 'http' else StubBackend()
+
+    pairs = ranked_pairs(load_analysis(args.file))[:args.top]
+
+    literature = None
+    if args.literature_index:
+        from literature_index import LiteratureIndex
+        literature = LiteratureIndex(args.literature_index)
+
+    cache = HypothesisCache(args.cache or hypothesis_cache_path(args.file))
+    start = time.perf_counter()
+    try:
+        stats = generate_reports(pairs, backend, cache, args.batch_size, args.concurrency, literature)
+    finally:
+        cache.close()
+        if literature:
+            literature.close()
+    print(f"Done in {time.perf_counter() - start:.1f}s: {stats}")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,298 @@
+# Instrumentation: Timers, counters and histograms for Echo hot paths, exported as JSON run reports or Prometheus text
+
+import atexit
+import bisect
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Dict, Tuple
+
+METRICS_ENV = 'ECHO_METRICS'
+PROFILE_ENV = 'ECHO_PROFILE'
+TRACE_ENV = 'ECHO_TRACE'
+METRIC_PREFIX = 'echo_'
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MAX_TRACE_EVENTS = 200000
+
+
+def label_key(labels: Dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'min': round(self.min, 6) if self.count else 0.0,
+            'max': round(self.max, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p90': round(self.quantile(0.9), 6),
+            'p99': round(self.quantile(0.99), 6),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.trace_events = None
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def trace(self, name: str, start: float, duration: float, labels: Dict):
+        with self.lock:
+            if self.trace_events is not None and len(self.trace_events) < MAX_TRACE_EVENTS:
+                self.trace_events.append({
+                    'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                    'ts': round(start * 1e6), 'dur': round(duration * 1e6), 'args': labels
+                })
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            if self.trace_events is not None:
+                self.trace_events = []
+            self.started = time.time()
+
+    def report(self) -> Dict:
+        with self.lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), **histogram.summary()}
+                          for (name, labels), histogram in sorted(self.histograms.items())]
+        return {
+            'script': Path(sys.argv[0]).name if sys.argv and sys.argv[0] else None,
+            'argv': sys.argv[1:],
+            'pid': os.getpid(),
+            'started_at': datetime.fromtimestamp(self.started).isoformat(),
+            'wall_seconds': round(time.time() - self.started, 3),
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def prometheus(self) -> str:
+        lines = []
+        with self.lock:
+            families = {}
+            for (name, labels), value in self.counters.items():
+                families.setdefault((name, 'counter'), []).append((labels, value))
+            for (name, labels), histogram in self.histograms.items():
+                families.setdefault((name, 'histogram'), []).append((labels, histogram))
+
+            for (name, kind), series in sorted(families.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} {kind}")
+                for labels, value in sorted(series, key=lambda s: s[0]):
+                    if kind == 'counter':
+                        lines.append(f"{metric}{format_labels(labels)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, n in zip(value.buckets + (float('inf'),), value.counts):
+                        cumulative += n
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{metric}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{format_labels(labels)} {value.sum}")
+                    lines.append(f"{metric}_count{format_labels(labels)} {value.count}")
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (k + '="' + v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for k, v in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+REGISTRY = MetricsRegistry()
+_configured = False
+
+
+def inc(name: str, value: float = 1, **labels):
+    REGISTRY.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    REGISTRY.observe(name, value, **labels)
+
+
+@contextmanager
+def timer(name: str, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        REGISTRY.observe(name, elapsed, **labels)
+        if REGISTRY.trace_events is not None:
+            REGISTRY.trace(name, start, elapsed, labels)
+
+
+def timed(name: str, **labels):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def report_path(template: str) -> Path:
+    script = Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else 'python'
+    return Path(template.format(script=script, pid=os.getpid()))
+
+
+def write_report(path, registry: MetricsRegistry = REGISTRY) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix in ('.prom', '.txt'):
+        content = registry.prometheus()
+    else:
+        content = json.dumps(registry.report(), indent=2)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+def write_trace(path, registry: MetricsRegistry = REGISTRY) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with registry.lock:
+        events = list(registry.trace_events or [])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return path
+
+
+def configure_from_env():
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    metrics = os.environ.get(METRICS_ENV)
+    trace = os.environ.get(TRACE_ENV)
+    profile = os.environ.get(PROFILE_ENV)
+
+    if trace:
+        REGISTRY.trace_events = []
+        atexit.register(lambda: print(f"Trace saved to: {write_trace(report_path(trace))}", file=sys.stderr))
+
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def dump_profile():
+            profiler.disable()
+            path = report_path(profile)
+            profiler.dump_stats(path)
+            print(f"Profile saved to: {path}", file=sys.stderr)
+        atexit.register(dump_profile)
+
+    if metrics:
+        for template in metrics.split(','):
+            atexit.register(lambda t=template: print(f"Run report saved to: {write_report(report_path(t))}",
+                                                     file=sys.stderr))
+
+
+def main():
+    import argparse
+    import pstats
+
+    parser = argparse.ArgumentParser(description='Inspect Echo run reports and profiles')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compare_parser = subparsers.add_parser('compare', help='Compare histogram timings between two JSON run reports')
+    compare_parser.add_argument('baseline', help='Baseline run report (JSON)')
+    compare_parser.add_argument('current', help='Current run report (JSON)')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='Relative p50 slowdown flagged as a regression (default: 0.2)')
+
+    profile_parser = subparsers.add_parser('profile', help='Print the top functions from a cProfile dump')
+    profile_parser.add_argument('file', help='Profile written via ECHO_PROFILE')
+    profile_parser.add_argument('-n', type=int, default=25, help='Number of functions to show (default: 25)')
+    profile_parser.add_argument('--sort', default='cumulative', help='pstats sort key (default: cumulative)')
+
+    args = parser.parse_args()
+
+    if args.command == 'profile':
+        pstats.Stats(args.file).sort_stats(args.sort).print_stats(args.n)
+        return 0
+
+    def load(path) -> Dict[Tuple, Dict]:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        return {(h['name'], label_key(h['labels'])): h for h in report['histograms']}
+
+    baseline, current = load(args.baseline), load(args.current)
+    regressions = 0
+    print(f"{'metric':<50}{'base p50':>12}{'cur p50':>12}{'change':>10}")
+    for key in sorted(set(baseline) | set(current)):
+        name = key[0] + format_labels(key[1])
+        if key not in baseline or key not in current:
+            print(f"{name:<50}{'only in ' + ('current' if key in current else 'baseline'):>34}")
+            continue
+        before, after = baseline[key]['p50'], current[key]['p50']
+        change = (after - before) / before if before else 0.0
+        flag = ' !' if change > args.threshold else ''
+        regressions += bool(flag)
+        print(f"{name:<50}{before * 1000:>10.2f}ms{after * 1000:>10.2f}ms{change:>+9.0%}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    exit(main())
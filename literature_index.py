@@ -0,0 +1,364 @@
+# Literature Index: Incremental BM25 index over offline abstract dumps (PubMed baseline XML or JSONL) for the Proposer
+
+import argparse
+import gzip
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MANIFEST = 'manifest.json'
+SEGMENT_DOCS = 200_000
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is', 'it',
+    'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'were', 'which', 'with'
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def encode_postings(postings: List[Tuple[int, int]]) -> bytes:
+    out = bytearray()
+    previous = 0
+    for doc_id, tf in postings:
+        for value in (doc_id - previous, tf):
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        previous = doc_id
+    return bytes(out)
+
+
+def decode_postings(buf, offset: int, length: int) -> Tuple[np.ndarray, np.ndarray]:
+    raw = np.frombuffer(buf, dtype=np.uint8, count=length, offset=offset)
+    ends = raw < 0x80
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    group = np.cumsum(np.concatenate(([0], ends[:-1].astype(np.int64))))
+    shift = (np.arange(len(raw)) - starts[group]) * 7
+    values = np.add.reduceat((raw & 0x7F).astype(np.int64) << shift, starts)
+    return np.cumsum(values[0::2]), values[1::2]
+
+
+def iter_pubmed_xml(path: Path) -> Iterator[Dict]:
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rb') as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            if elem.tag != 'PubmedArticle':
+                continue
+            citation = elem.find('MedlineCitation')
+            article = citation.find('Article') if citation is not None else None
+            if article is not None:
+                abstract = ' '.join(''.join(t.itertext()) for t in article.findall('Abstract/AbstractText'))
+                if abstract:
+                    yield {
+                        'pmid': citation.findtext('PMID', default=''),
+                        'title': ''.join(article.find('ArticleTitle').itertext()) if article.find('ArticleTitle') is not None else '',
+                        'abstract': abstract
+                    }
+            elem.clear()
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict]:
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get('abstract'):
+                    yield {'pmid': str(record.get('pmid', '')), 'title': record.get('title', ''),
+                           'abstract': record['abstract']}
+
+
+DUMP_SUFFIXES = {
+    '.xml': iter_pubmed_xml, '.xml.gz': iter_pubmed_xml,
+    '.jsonl': iter_jsonl, '.jsonl.gz': iter_jsonl, '.json': iter_jsonl
+}
+
+
+def dump_reader(path: Path):
+    name = path.name.lower()
+    for suffix, reader in DUMP_SUFFIXES.items():
+        if name.endswith(suffix):
+            return reader
+    return None
+
+
+def iter_dump(path: Path) -> Iterator[Dict]:
+    reader = dump_reader(path)
+    if reader is None:
+        raise ValueError(f"Unsupported dump format: {path}")
+    return reader(path)
+
+
+def write_segment(segment_dir: Path, docs: List[Dict]):
+    segment_dir.mkdir(parents=True, exist_ok=True)
+    postings = defaultdict(list)
+    lengths = array('I')
+    offsets = array('Q')
+
+    with open(segment_dir / 'docs.jsonl', 'wb') as f:
+        for doc_id, doc in enumerate(docs):
+            offsets.append(f.tell())
+            f.write(json.dumps(doc, ensure_ascii=False).encode('utf-8') + b'\n')
+            tokens = tokenize(doc['title'] + ' ' + doc['abstract'])
+            lengths.append(len(tokens))
+            counts = defaultdict(int)
+            for token in tokens:
+                counts[token] += 1
+            for token, tf in counts.items():
+                postings[token].append((doc_id, tf))
+        offsets.append(f.tell())
+
+    terms = {}
+    with open(segment_dir / 'postings.bin', 'wb') as f:
+        for term in sorted(postings):
+            encoded = encode_postings(postings[term])
+            terms[term] = [f.tell(), len(encoded), len(postings[term])]
+            f.write(encoded)
+
+    with open(segment_dir / 'terms.json', 'w', encoding='utf-8') as f:
+        json.dump(terms, f, separators=(',', ':'))
+    with open(segment_dir / 'lengths.bin', 'wb') as f:
+        lengths.tofile(f)
+    with open(segment_dir / 'offsets.bin', 'wb') as f:
+        offsets.tofile(f)
+    return {'name': segment_dir.name, 'docs': len(docs), 'tokens': sum(lengths)}
+
+
+def load_manifest(index_dir: Path) -> Dict:
+    path = index_dir / MANIFEST
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'segments': [], 'sources': {}}
+
+
+def save_manifest(index_dir: Path, manifest: Dict):
+    tmp = index_dir / (MANIFEST + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, index_dir / MANIFEST)
+
+
+def find_dumps(paths: Iterable[str]) -> List[Path]:
+    dumps = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            for f in sorted(f for f in p.iterdir() if f.is_file() and not f.name.startswith('.')):
+                if dump_reader(f):
+                    dumps.append(f)
+                else:
+                    print(f"Warning: skipping {f} (not a PubMed XML or JSONL dump)")
+        else:
+            dumps.append(p)
+    return dumps
+
+
+def build_index(index_dir: str, dump_paths: Iterable[str], segment_docs: int = SEGMENT_DOCS) -> int:
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(index_dir)
+
+    pending = []
+    for dump in find_dumps(dump_paths):
+        stat = dump.stat()
+        if manifest['sources'].get(str(dump.resolve())) == [stat.st_size, int(stat.st_mtime)]:
+            continue
+        pending.append((dump, [stat.st_size, int(stat.st_mtime)]))
+
+    if not pending:
+        print("Literature index is up to date")
+        return 0
+
+    manifest.setdefault('next_segment', len(manifest['segments']))
+    added = 0
+    docs = []
+    segments = []
+
+    def flush():
+        nonlocal docs, added
+        if not docs:
+            return
+        number = manifest['next_segment'] + len(segments)
+        segment = write_segment(index_dir / f"seg_{number:05d}", docs)
+        segments.append(segment)
+        added += len(docs)
+        docs = []
+        print(f"  Wrote segment {segment['name']}: {segment['docs']} abstracts")
+
+    for dump, signature in pending:
+        source = str(dump.resolve())
+        print(f"Indexing {dump}...")
+        for doc in iter_dump(dump):
+            docs.append(doc)
+            if len(docs) >= segment_docs:
+                flush()
+        flush()
+
+        stale = [s for s in manifest['segments'] if s.get('source') == source]
+        manifest['segments'] = [s for s in manifest['segments'] if s.get('source') != source]
+        manifest['segments'].extend({**segment, 'source': source} for segment in segments)
+        manifest['next_segment'] += len(segments)
+        manifest['sources'][source] = signature
+        save_manifest(index_dir, manifest)
+        for segment in stale:
+            shutil.rmtree(index_dir / segment['name'], ignore_errors=True)
+        if stale:
+            print(f"  Replaced {len(stale)} segments from the previous version of {dump.name}")
+        segments = []
+
+    print(f"Indexed {added} new abstracts from {len(pending)} dump files")
+    return added
+
+
+class Segment:
+    def __init__(self, segment_dir: Path):
+        with open(segment_dir / 'terms.json', 'r', encoding='utf-8') as f:
+            self.terms = json.load(f)
+        self.lengths = np.fromfile(segment_dir / 'lengths.bin', dtype=np.uint32).astype(np.float64)
+        self.offsets = np.fromfile(segment_dir / 'offsets.bin', dtype=np.uint64)
+        self._files = [open(segment_dir / name, 'rb') for name in ('postings.bin', 'docs.jsonl')]
+        self.postings, self.docs = [
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+            for f in self._files
+        ]
+
+    def df(self, term: str) -> int:
+        entry = self.terms.get(term)
+        return entry[2] if entry else 0
+
+    def term_postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        entry = self.terms.get(term)
+        if not entry:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return decode_postings(self.postings, entry[0], entry[1])
+
+    def document(self, doc_id: int) -> Dict:
+        return json.loads(self.docs[int(self.offsets[doc_id]):int(self.offsets[doc_id + 1])])
+
+    def close(self):
+        for m in (self.postings, self.docs):
+            if isinstance(m, mmap.mmap):
+                m.close()
+        for f in self._files:
+            f.close()
+
+
+class LiteratureIndex:
+    def __init__(self, index_dir: str):
+        self.index_dir = Path(index_dir)
+        manifest = load_manifest(self.index_dir)
+        self.segments = [Segment(self.index_dir / s['name']) for s in manifest['segments']]
+        self.total_docs = sum(s['docs'] for s in manifest['segments'])
+        total_tokens = sum(s['tokens'] for s in manifest['segments'])
+        self.avg_length = total_tokens / self.total_docs if self.total_docs else 0.0
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+    def idf(self, term: str) -> float:
+        df = sum(segment.df(term) for segment in self.segments)
+        return math.log(1 + (self.total_docs - df + 0.5) / (df + 0.5))
+
+    def search(self, drug: str, symptom: Optional[str] = None, k: int = 10,
+               require_all: bool = True) -> List[Dict]:
+        terms = sorted(set(tokenize(drug) + (tokenize(symptom) if symptom else [])))
+        if not terms or not self.total_docs:
+            return []
+        idf = {t: self.idf(t) for t in terms}
+
+        heap = []
+        for seg_no, segment in enumerate(self.segments):
+            if require_all and any(segment.df(t) == 0 for t in terms):
+                continue
+            postings = {term: segment.term_postings(term) for term in sorted(terms, key=segment.df)}
+            doc_lists = [docs for docs, _ in postings.values() if len(docs)]
+            if not doc_lists:
+                continue
+            candidates = doc_lists[0]
+            for docs in doc_lists[1:]:
+                candidates = (np.intersect1d(candidates, docs, assume_unique=True) if require_all
+                              else np.union1d(candidates, docs))
+            if not len(candidates):
+                continue
+
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.lengths[candidates] / self.avg_length)
+            scores = np.zeros(len(candidates))
+            for term, (docs, tfs) in postings.items():
+                if not len(docs):
+                    continue
+                pos = np.minimum(np.searchsorted(docs, candidates), len(docs) - 1)
+                tf = np.where(docs[pos] == candidates, tfs[pos], 0)
+                scores += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+
+            top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+            for i in top:
+                entry = (float(scores[i]), seg_no, int(candidates[i]))
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        results = []
+        for score, seg_no, doc_id in sorted(heap, reverse=True):
+            doc = self.segments[seg_no].document(doc_id)
+            doc['score'] = round(score, 4)
+            results.append(doc)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query a local BM25 index over biomedical abstracts')
+    parser.add_argument('--index-dir', default='literature_index', help='Index directory (default: literature_index)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Index new dump files (already indexed files are skipped)')
+    build.add_argument('dumps', nargs='+', help='PubMed XML(.gz) / JSONL(.gz) files or folders containing them')
+    build.add_argument('--segment-docs', type=int, default=SEGMENT_DOCS,
+                       help=f'Maximum abstracts per segment (default: {SEGMENT_DOCS})')
+
+    query = subparsers.add_parser('query', help='Find abstracts supporting a drug-symptom association')
+    query.add_argument('--drug', required=True, help='Drug name')
+    query.add_argument('--symptom', help='Symptom name')
+    query.add_argument('-k', type=int, default=10, help='Number of abstracts to return (default: 10)')
+    query.add_argument('--any', action='store_true', help='Match abstracts mentioning any term instead of all')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_index(args.index_dir, args.dumps, args.segment_docs)
+        return 0
+
+    index = LiteratureIndex(args.index_dir)
+    start = time.perf_counter()
+    results = index.search(args.drug, args.symptom, k=args.k, require_all=not args.any)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Found {len(results)} abstracts for {args.drug} / {args.symptom or '*'} in {elapsed:.1f} ms")
+    for doc in results:
+        print(f"\n[{doc['score']}] PMID {doc['pmid']}: {doc['title']}")
+        print(f"  {doc['abstract'][:300]}")
+    index.close()
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,208 @@
+# openFDA Stub: Local stand-in for the /drug/label.json and /drug/event.json endpoints used by the Verifier
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_FIXTURE = {
+    "labels": {
+        "keytruda": {
+            "openfda": {"brand_name": ["KEYTRUDA"], "generic_name": ["PEMBROLIZUMAB"]},
+            "effective_time": "20230615",
+            "adverse_reactions": ["The most common adverse reactions were fatigue, rash, diarrhea, nausea and pain."]
+        },
+        "opdivo": {
+            "openfda": {"brand_name": ["OPDIVO"], "generic_name": ["NIVOLUMAB"]},
+            "effective_time": "20221104",
+            "adverse_reactions": ["The most common adverse reactions were fatigue, rash, and musculoskeletal pain."]
+        },
+        "taxol": {
+            "openfda": {"brand_name": ["TAXOL"], "generic_name": ["PACLITAXEL"]},
+            "effective_time": "20210330",
+            "adverse_reactions": ["Neuropathy, hair loss, nausea, vomiting and diarrhea were commonly reported."]
+        },
+        "tamoxifen": {
+            "openfda": {"brand_name": ["SOLTAMOX"], "generic_name": ["TAMOXIFEN CITRATE"]},
+            "effective_time": "20200812",
+            "adverse_reactions": ["Hot flashes, fatigue and nausea were the most frequently reported reactions."]
+        }
+    },
+    "events": {
+        "keytruda": [["FATIGUE", 5210], ["RASH", 2890], ["DIARRHOEA", 2410], ["NAUSEA", 1980], ["PAIN", 1320]],
+        "opdivo": [["FATIGUE", 4820], ["RASH", 2140], ["PAIN", 1750], ["HEADACHE", 610]],
+        "taxol": [["NEUROPATHY", 3910], ["ALOPECIA", 2230], ["NAUSEA", 1870], ["VOMITING", 1290]],
+        "tamoxifen": [["HOT FLUSH", 2750], ["FATIGUE", 1440], ["NAUSEA", 990], ["WEIGHT INCREASED", 540]]
+    }
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> Tuple[bool, float]:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True, 0.0
+            return False, (1 - self.tokens) / self.rate
+
+
+class OpenFDAStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixture: Dict = None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: float = 0.0, seed: int = 0):
+        super().__init__(address, OpenFDAStubHandler)
+        fixture = fixture or DEFAULT_FIXTURE
+        self.labels = {k.lower(): v for k, v in fixture.get("labels", {}).items()}
+        self.events = {k.lower(): v for k, v in fixture.get("events", {}).items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit) if rate_limit > 0 else None
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+    def record(self, key: str):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats.clear()
+
+    def resolve(self, names):
+        for name in names:
+            name = name.lower()
+            if name in self.labels:
+                return name
+            for drug, label in self.labels.items():
+                openfda = label.get("openfda", {})
+                if any(name == n.lower() for n in openfda.get("brand_name", []) + openfda.get("generic_name", [])):
+                    return drug
+        return None
+
+
+class OpenFDAStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, payload: Dict, headers: Dict = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.record('requests')
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+        if server.bucket:
+            allowed, retry_after = server.bucket.take()
+            if not allowed:
+                server.record('status_429')
+                self.send_json(429, {"error": {"code": "TOO_MANY_REQUESTS", "message": "Rate limit exceeded"}},
+                               {'Retry-After': f"{retry_after:.3f}"})
+                return
+
+        with server.random_lock:
+            delay = max(0.0, server.latency + server.random.uniform(-server.jitter, server.jitter))
+            fail = server.random.random() < server.error_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            server.record('status_500')
+            self.send_json(500, {"error": {"code": "SERVER_ERROR", "message": "Injected failure"}})
+            return
+
+        names = re.findall(r'"([^"]+)"', params.get('search', ''))
+        drug = server.resolve(names)
+        limit = int(params.get('limit', 1))
+
+        if parsed.path == '/drug/label.json':
+            results = [server.labels[drug]] if drug else []
+        elif parsed.path == '/drug/event.json' and 'count' in params:
+            results = [{"term": t, "count": c} for t, c in server.events.get(drug, [])]
+        else:
+            server.record('status_404')
+            self.send_json(404, {"error": {"code": "NOT_FOUND", "message": "Unknown endpoint"}})
+            return
+
+        if not results:
+            server.record('status_404')
+            self.send_json(404, {"error": {"code": "NOT_FOUND", "message": "No matches found!"}})
+            return
+
+        server.record('status_200')
+        self.send_json(200, {
+            "meta": {"results": {"skip": 0, "limit": limit, "total": len(results)}},
+            "results": results[:limit]
+        })
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, **kwargs) -> OpenFDAStubServer:
+    server = OpenFDAStubServer((host, port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def load_fixture(path: Optional[str]) -> Dict:
+    if not path:
+        return DEFAULT_FIXTURE
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fixture data on local openFDA-compatible endpoints')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to bind (default: 8765)')
+    parser.add_argument('--fixture', help='JSON file with "labels" and "events" keyed by drug (default: built-in)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Uniform +/- latency jitter in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Requests per second before HTTP 429 (0 = off)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for latency jitter and error injection')
+    args = parser.parse_args()
+
+    server = OpenFDAStubServer((args.host, args.port), fixture=load_fixture(args.fixture),
+                               latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                               rate_limit=args.rate_limit, seed=args.seed)
+    print(f"openFDA stub listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {server.stats['requests']} requests: {dict(server.stats)}")
+
+if __name__ == '__main__':
+    main()
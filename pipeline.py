@@ -0,0 +1,313 @@
+# Pipeline: Runs Explorer -> aggregation -> Analyzer -> Verifier/Proposer as a content-addressed DAG
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from instrumentation import configure_from_env, observe
+
+PIPELINE_VERSION = 1
+CACHE_DIR = '.echo_cache'
+SCRIPT_DIR = Path(__file__).resolve().parent
+PIPELINE_SOURCE = str(Path(__file__).resolve())
+
+
+class FileHasher:
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self.entries = {}
+        if cache_file.exists():
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def file_digest(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path.resolve())
+        signature = [stat.st_size, stat.st_mtime_ns]
+        cached = self.entries.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self.entries[key] = [signature, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def digest(self, path: Path) -> str:
+        if not path.exists():
+            return 'missing'
+        if path.is_file():
+            return self.file_digest(path)
+        digest = hashlib.sha256()
+        for child in sorted(p for p in path.rglob('*') if p.is_file()):
+            digest.update(str(child.relative_to(path)).encode('utf-8') + b'\0')
+            digest.update(self.file_digest(child).encode('ascii'))
+        return digest.hexdigest()
+
+    def save(self):
+        tmp = self.cache_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.cache_file)
+
+
+class Stage:
+    def __init__(self, name: str, run: Callable[['Stage'], None], inputs: List[str] = (),
+                 outputs: List[str] = (), deps: List[str] = (), params: Optional[Dict] = None,
+                 cacheable: bool = True):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.params = params or {}
+        self.cacheable = cacheable
+
+
+def copy_path(src: Path, dst: Path):
+    if dst.exists():
+        shutil.rmtree(dst) if dst.is_dir() else dst.unlink()
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.is_dir():
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+class Pipeline:
+    def __init__(self, workdir: str, stages: List[Stage], jobs: int = 2, force: List[str] = ()):
+        self.workdir = Path(workdir).resolve()
+        self.stages = {stage.name: stage for stage in stages}
+        self.jobs = jobs
+        self.force = set(force)
+        self.cache = self.workdir / CACHE_DIR
+        self.cache.mkdir(parents=True, exist_ok=True)
+        self.hasher = FileHasher(self.cache / 'file_hashes.json')
+
+    def path(self, relative: str) -> Path:
+        return self.workdir / relative
+
+    def stage_key(self, stage: Stage) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            'version': PIPELINE_VERSION,
+            'stage': stage.name,
+            'params': stage.params,
+            'inputs': {i: self.hasher.digest(self.path(i)) for i in stage.inputs}
+        }, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def restore(self, stage: Stage, key: str) -> bool:
+        entry = self.cache / 'objects' / key
+        manifest = entry / 'manifest.json'
+        if not manifest.exists():
+            return False
+        with open(manifest, 'r', encoding='utf-8') as f:
+            outputs = json.load(f)
+        for output, digest in outputs.items():
+            if self.hasher.digest(self.path(output)) != digest:
+                copy_path(entry / 'outputs' / output, self.path(output))
+        return True
+
+    def store(self, stage: Stage, key: str):
+        entry = self.cache / 'objects' / key
+        tmp = entry.with_name(key + '.tmp')
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        outputs = {}
+        for output in stage.outputs:
+            copy_path(self.path(output), tmp / 'outputs' / output)
+            outputs[output] = self.hasher.digest(self.path(output))
+        with open(tmp / 'manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(outputs, f, indent=2)
+        if entry.exists():
+            shutil.rmtree(entry)
+        os.replace(tmp, entry)
+
+    def execute(self, stage: Stage) -> str:
+        key = self.stage_key(stage)
+        if stage.cacheable and stage.name not in self.force and self.restore(stage, key):
+            return 'cached'
+        stage.run(stage)
+        missing = [o for o in stage.outputs if not self.path(o).exists()]
+        if missing:
+            raise RuntimeError(f"stage did not produce {', '.join(missing)}")
+        if stage.cacheable:
+            self.store(stage, key)
+        return 'ran'
+
+    def run(self, targets: Optional[List[str]] = None) -> Dict[str, str]:
+        selected = set()
+        pending_targets = list(targets if targets is not None else self.stages)
+        while pending_targets:
+            name = pending_targets.pop()
+            if name not in selected:
+                selected.add(name)
+                pending_targets.extend(d for d in self.stages[name].deps if d in self.stages)
+
+        status = {}
+        waiting = {name: {d for d in self.stages[name].deps if d in selected} for name in selected}
+        dependents = defaultdict(list)
+        for name, deps in waiting.items():
+            for dep in deps:
+                dependents[dep].append(name)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            running = {}
+
+            def submit_ready():
+                for name in sorted(n for n, deps in waiting.items() if not deps and n not in status and n not in running.values()):
+                    print(f"[{name}] starting")
+                    running[pool.submit(self.timed, self.stages[name])] = name
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        status[name], elapsed = future.result()
+                        print(f"[{name}] {status[name]} in {elapsed:.2f}s")
+                        for child in dependents[name]:
+                            waiting[child].discard(name)
+                    except Exception as e:
+                        status[name] = 'failed'
+                        print(f"[{name}] failed: {e}")
+                        blocked = list(dependents[name])
+                        while blocked:
+                            child = blocked.pop()
+                            if child not in status:
+                                status[child] = 'skipped'
+                                print(f"[{child}] skipped (upstream failure)")
+                                blocked.extend(dependents[child])
+                submit_ready()
+
+        self.hasher.save()
+        return status
+
+    def timed(self, stage: Stage):
+        start = time.perf_counter()
+        result = self.execute(stage)
+        elapsed = time.perf_counter() - start
+        observe('pipeline_stage_seconds', elapsed, stage=stage.name, result=result)
+        return result, elapsed
+
+
+def run_script(workdir: Path, script: str, *args: str, stdout: Optional[Path] = None):
+    command = [sys.executable, str(SCRIPT_DIR / script), *args]
+    if stdout:
+        with open(stdout, 'w', encoding='utf-8') as f:
+            subprocess.run(command, cwd=workdir, check=True, stdout=f)
+    else:
+        subprocess.run(command, cwd=workdir, check=True)
+
+
+def aggregate_extractions(reddit_dir: Path, aggregate_dir: Path) -> int:
+    by_drug = defaultdict(list)
+    for path in sorted(reddit_dir.glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            post = json.load(f)
+        for extraction in post.get('extractions', []):
+            drug = extraction.get('drug_canonical') or extraction.get('drug')
+            if drug:
+                by_drug[drug].append(extraction)
+
+    tmp = aggregate_dir.with_name(aggregate_dir.name + '.tmp')
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    for drug, extractions in by_drug.items():
+        with open(tmp / f"{drug}.json", 'w', encoding='utf-8') as f:
+            json.dump(extractions, f, indent=2, ensure_ascii=False)
+    if aggregate_dir.exists():
+        shutil.rmtree(aggregate_dir)
+    os.replace(tmp, aggregate_dir)
+    return len(by_drug)
+
+
+def verify_associations(analysis_file: Path, output_file: Path, base_url: str):
+    from verifier_agent import FDAAdverseReactionExtractor, get_variants_and_terms, get_side_effect_score
+
+    with open(analysis_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    extractor = FDAAdverseReactionExtractor(base_url=base_url)
+    results = []
+    for drug, symptoms in data.items():
+        variants, faers_terms = get_variants_and_terms(extractor, drug)
+        for symptom in symptoms:
+            if symptom != 'null':
+                results.append(get_side_effect_score(extractor, variants, faers_terms, drug, symptom))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def build_stages(args, workdir: Path) -> List[Stage]:
+    return [
+        Stage('explore', lambda s: run_script(workdir, 'explorer_agent.py'),
+              outputs=['reddit_data'], cacheable=False),
+        Stage('aggregate', lambda s: aggregate_extractions(workdir / 'reddit_data', workdir / 'aggregate'),
+              inputs=['reddit_data', PIPELINE_SOURCE], outputs=['aggregate'], deps=['explore']),
+        Stage('analyze', lambda s: run_script(workdir, 'analyzer_agent.py', '--aggregate_folder', 'aggregate',
+                                              '-o', 'side_effects_analysis.json'),
+              inputs=['aggregate', str(SCRIPT_DIR / 'analyzer_agent.py')],
+              outputs=['side_effects_analysis.json', 'side_effects_analysis.confounders.json'], deps=['aggregate']),
+        Stage('verify', lambda s: verify_associations(workdir / 'side_effects_analysis.json',
+                                                      workdir / 'verification.json', args.openfda_url),
+              inputs=['side_effects_analysis.json', str(SCRIPT_DIR / 'verifier_agent.py'), PIPELINE_SOURCE],
+              outputs=['verification.json'], deps=['analyze'], params={'openfda_url': args.openfda_url}),
+        Stage('propose', lambda s: run_script(workdir, 'proposer_agent.py', '--file', 'side_effects_analysis.json',
+                                              '-n', str(args.top_confounders),
+                                              stdout=workdir / 'proposer_report.txt'),
+              inputs=['side_effects_analysis.json', 'side_effects_analysis.confounders.json',
+                      str(SCRIPT_DIR / 'proposer_agent.py')],
+              outputs=['proposer_report.txt'], deps=['analyze'], params={'n': args.top_confounders}),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the Echo agents as a cached, parallel pipeline')
+    parser.add_argument('--workdir', default='.', help='Directory holding pipeline inputs and outputs (default: .)')
+    parser.add_argument('--stages', nargs='+', choices=['explore', 'aggregate', 'analyze', 'verify', 'propose'],
+                        help='Target stages; their upstream stages run as needed (default: all but explore)')
+    parser.add_argument('--explore', action='store_true', help='Scrape Reddit instead of reusing reddit_data/')
+    parser.add_argument('--force', nargs='+', default=[], help='Stages to rerun even when their inputs are unchanged')
+    parser.add_argument('--jobs', type=int, default=2, help='Stages to run in parallel (default: 2)')
+    parser.add_argument('--openfda-url', default='https://api.fda.gov',
+                        help='openFDA base URL for the verify stage (default: https://api.fda.gov)')
+    parser.add_argument('--top-confounders', type=int, default=10, help='Confounders in the proposer report (default: 10)')
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir).resolve()
+    stages = build_stages(args, workdir)
+    if not args.explore:
+        stages = [s for s in stages if s.name != 'explore']
+        if not (workdir / 'reddit_data').is_dir():
+            print(f"Error: {workdir / 'reddit_data'} does not exist (use --explore to scrape it)")
+            return 1
+
+    pipeline = Pipeline(workdir, stages, jobs=args.jobs, force=args.force)
+    removed = [t for t in args.stages or [] if t not in pipeline.stages]
+    if removed:
+        print(f"Error: stage {', '.join(removed)} requires Reddit scraping (pass --explore)")
+        return 1
+    targets = args.stages or [s.name for s in stages]
+    status = pipeline.run(targets)
+    print("\nPipeline summary:")
+    for stage in stages:
+        if stage.name in status:
+            print(f"  {stage.name}: {status[stage.name]}")
+    return 1 if any(s in ('failed', 'skipped') for s in status.values()) else 0
+
+if __name__ == '__main__':
+    configure_from_env()
+    exit(main())
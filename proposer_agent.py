@@ -1,43 +1,130 @@
 # Proposer Agent: Identifies and ranks most common confounders across drug-symptom associations
 
-import json
 import argparse
-from collections import Counter, defaultdict
+import os
+from itertools import islice
+
+from analyzer_agent import ConfounderIndex, confounder_index_path, confounder_index_from_analysis
+
+def load_confounder_index(analysis_file, index_file=None):
+    index_file = index_file or confounder_index_path(analysis_file)
+    if os.path.exists(index_file) and (
+            not os.path.exists(analysis_file) or os.path.getmtime(index_file) >= os.path.getmtime(analysis_file)):
+        try:
+            return ConfounderIndex.open(index_file)
+        except ValueError:
+            pass
+
+    from columnar_store import load_analysis
+
+    print(f"No up-to-date confounder index at {index_file}, scanning {analysis_file}")
+    return confounder_index_from_analysis(load_analysis(analysis_file, fields=("confounders",)))
+
+def top_confounders(index, n):
+    return [(conf, index.entry(conf)) for conf in islice(index.ranking, n)]
+
+def print_confounder(conf, entry):
+    drugs = {drug for drug, _, _ in entry["postings"]}
+    associations = {(drug, symptom) for drug, symptom, _ in entry["postings"]}
+    print(f"{conf}: {entry['score']}, {drugs}")
+    print(associations)
+    print("\n")
+
+def run_similarity(args, index):
+    from confounder_matrix import ConfounderMatrix, top_pairs, most_similar
+
+    matrix = ConfounderMatrix.from_index(index)
+    axis, noun = ("confounders", "confounder") if args.command == "cooccur" else ("drugs", "drug")
+    labels, m = matrix.view(axis)
+    rows = matrix.confounder_row if axis == "confounders" else matrix.drug_row
+
+    if args.item:
+        if args.item not in rows:
+            print(f"{args.item}: not found")
+            return
+        print(f"Top {args.k} {axis} similar to {args.item} ({args.metric}):")
+        for score, other, shared in most_similar(labels, m, rows[args.item], args.k, args.metric, args.min_shared):
+            print(f"{other}: {score:.4f} ({shared} shared)")
+        return
+
+    method, pairs = top_pairs(labels, m, k=args.k, metric=args.metric, min_shared=args.min_shared,
+                              method=args.method, num_perm=args.num_perm, bands=args.bands,
+                              max_exact_pairs=args.max_exact_pairs)
+    print(f"Top {args.k} {noun} pairs by {args.metric} ({method}):")
+    for score, a, b, shared in pairs:
+        print(f"{a} / {b}: {score:.4f} ({shared} shared)")
+
+def run_literature(args):
+    from literature_index import LiteratureIndex
+
+    literature = LiteratureIndex(args.index_dir)
+    try:
+        results = literature.search(args.drug, args.symptom, k=args.k, require_all=not args.any)
+    finally:
+        literature.close()
+    print(f"Top {len(results)} abstracts for {args.drug} / {args.symptom or '*'}:")
+    for doc in results:
+        print(f"[{doc['score']}] PMID {doc['pmid']}: {doc['title']}")
+        print(f"  {doc['abstract'][:300]}")
 
 def main():
     parser = argparse.ArgumentParser(description="Find top N most common confounders (count based on max per symptom).")
     parser.add_argument("--file", help="Path to the JSON file")
+    parser.add_argument("--index", help="Path to the confounder index (default: sidecar written by the analyzer)")
     parser.add_argument("-n", type=int, default=10, help="Number of top confounders to show (default: 10)")
+    parser.add_argument("--confounder", action="append", help="Show the drug-symptom postings of this confounder (repeatable)")
+
+    subparsers = parser.add_subparsers(dest="command")
+    for name, item, default_metric, help_text in (
+            ("cooccur", "--confounder", "jaccard", "Confounders that occur with the same drugs"),
+            ("similar-drugs", "--drug", "cosine", "Drugs with similar confounder profiles")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument(item, dest="item", help="Rank neighbours of this single entry instead of all pairs")
+        sub.add_argument("-k", type=int, default=10, help="Number of results (default: 10)")
+        sub.add_argument("--metric", choices=("count", "jaccard", "cosine"), default=default_metric,
+                         help=f"Similarity metric (default: {default_metric})")
+        sub.add_argument("--min-shared", type=int, default=2, help="Minimum shared entries per pair (default: 2)")
+        sub.add_argument("--method", choices=("auto", "exact", "lsh"), default="auto",
+                         help="All-pairs strategy; auto switches to MinHash LSH for large inputs (default: auto)")
+        sub.add_argument("--max-exact-pairs", type=int, default=50_000_000,
+                         help="Candidate pair budget before auto switches to LSH (default: 50000000)")
+        sub.add_argument("--num-perm", type=int, default=128, help="MinHash permutations (default: 128)")
+        sub.add_argument("--bands", type=int, default=32, help="LSH bands (default: 32)")
+    literature = subparsers.add_parser("literature", help="Supporting abstracts from a local literature index")
+    literature.add_argument("--index-dir", default="literature_index",
+                            help="Index built by literature_index.py build (default: literature_index)")
+    literature.add_argument("--drug", required=True, help="Drug name")
+    literature.add_argument("--symptom", help="Symptom name")
+    literature.add_argument("-k", type=int, default=5, help="Number of abstracts (default: 5)")
+    literature.add_argument("--any", action="store_true", help="Match abstracts mentioning any term instead of all")
     args = parser.parse_args()
+    if args.command == "literature":
+        run_literature(args)
+        return
+    if args.command and (args.bands <= 0 or args.num_perm % args.bands):
+        parser.error(f"--num-perm ({args.num_perm}) must be a positive multiple of --bands ({args.bands})")
+
+    index = load_confounder_index(args.file, args.index)
+
+    if args.command:
+        run_similarity(args, index)
+        return
+
+    if args.confounder:
+        for conf in args.confounder:
+            entry = index.entry(conf)
+            if entry is None:
+                print(f"{conf}: not found")
+                continue
+            print(f"{conf}: {entry['drugs']} drugs, {entry['symptoms']} symptoms")
+            for drug, symptom, count in entry["postings"]:
+                print(f"  {drug} / {symptom}: {count}")
+            print("\n")
+        return
 
-    with open(args.file, "r") as f:
-        data = json.load(f)
-
-    confounder_counts = Counter()
-    seen = set()
-    total = defaultdict(set)
-    confounder_ass = defaultdict(set)
-
-    for drug, symptoms in data.items():
-        for symptom, entries in symptoms.items():
-            for entry in entries:
-                try:
-                    for conf in entry.get("confounders", []):
-                        seen.add((conf, symptom))
-                        total[conf].add(drug)
-                        confounder_ass[conf].add((drug, symptom))
-                except:
-                    continue
-
-    for c, s in seen:
-        if(len(total[c]) < 3):
-            continue
-        confounder_counts[c] += 1/len(total[c])
     print(f"Top {args.n} confounders:")
-    for conf, count in confounder_counts.most_common(args.n):
-        print(f"{conf}: {count}, {total[conf]}")
-        print(confounder_ass[conf])
-        print("\n")
+    for conf, entry in top_confounders(index, args.n):
+        print_confounder(conf, entry)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
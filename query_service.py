@@ -0,0 +1,171 @@
+# Query Service: Headless HTTP/JSON access to Echo associations with paging, sorting, search and hot reload
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+from association_model import AssociationModel, NUMERIC_COLUMNS, TEXT_COLUMNS
+from columnar_store import is_columnar
+from evidence_store import evidence_path
+from search_index import AssociationSearchIndex
+
+ROW_FIELDS = TEXT_COLUMNS + NUMERIC_COLUMNS + ('n_reports',)
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+
+class AssociationDataset:
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        if is_columnar(path):
+            self.model, self.evidence = AssociationModel.from_columnar(path)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw_data = json.load(f)
+            self.model, self.evidence = AssociationModel.from_raw(raw_data, evidence_path(path), source=path)
+        frame = self.model.frame
+        self.search = AssociationSearchIndex(frame)
+        self.rows = frame[list(ROW_FIELDS)]
+        self.pairs = {pair: i for i, pair in enumerate(zip(frame['drug'], frame['symptom']))}
+        self.loaded_at = datetime.now().isoformat()
+
+    def query(self, q: str = '', sort: Optional[str] = None, descending: bool = False,
+              offset: int = 0, limit: int = DEFAULT_LIMIT) -> Dict:
+        matches = self.search.search(q) if q else None
+        view = self.model.view(sort, descending, matches)
+        page = view[offset:offset + limit]
+        return {
+            'total': len(view),
+            'offset': offset,
+            'limit': limit,
+            'rows': self.rows.iloc[page].to_dict('records')
+        }
+
+    def evidence_for(self, drug: str, symptom: str) -> Optional[Dict]:
+        i = self.pairs.get((drug, symptom))
+        if i is None:
+            return None
+        row = self.model.row(i)
+        result = {field: row[field] for field in ROW_FIELDS}
+        result.update(self.evidence.get(row['evidence_offset'], row['evidence_length']))
+        return result
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, path: str, reload_interval: float = 2.0):
+        super().__init__(address, QueryHandler)
+        self.source = path
+        self.dataset = AssociationDataset(path)
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.stopped = threading.Event()
+        if reload_interval > 0:
+            threading.Thread(target=self.watch, daemon=True).start()
+
+    def watch(self):
+        while not self.stopped.wait(self.reload_interval):
+            try:
+                if os.path.getmtime(self.source) == self.dataset.mtime:
+                    continue
+                start = time.perf_counter()
+                self.dataset = AssociationDataset(self.source)
+                self.reloads += 1
+                print(f"Reloaded {self.source}: {len(self.dataset.model)} associations "
+                      f"in {time.perf_counter() - start:.2f}s")
+            except Exception as e:
+                print(f"Error reloading {self.source}: {e}")
+
+    def server_close(self):
+        self.stopped.set()
+        super().server_close()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        dataset = self.server.dataset
+
+        try:
+            if parsed.path == '/associations':
+                sort = params.get('sort')
+                if sort is not None and sort not in TEXT_COLUMNS + NUMERIC_COLUMNS:
+                    self.send_json(400, {'error': f"Unknown sort field: {sort}"})
+                    return
+                self.send_json(200, dataset.query(
+                    q=params.get('q', ''),
+                    sort=sort,
+                    descending=params.get('order', 'asc') == 'desc',
+                    offset=max(0, int(params.get('offset', 0))),
+                    limit=max(0, min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT))
+                ))
+            elif parsed.path == '/evidence':
+                result = dataset.evidence_for(params.get('drug', ''), params.get('symptom', ''))
+                if result is None:
+                    self.send_json(404, {'error': 'Unknown drug-symptom pair'})
+                else:
+                    self.send_json(200, result)
+            elif parsed.path == '/health':
+                self.send_json(200, {
+                    'source': dataset.path,
+                    'associations': len(dataset.model),
+                    'loaded_at': dataset.loaded_at,
+                    'reloads': self.server.reloads
+                })
+            else:
+                self.send_json(404, {'error': 'Unknown endpoint'})
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+
+
+def start_server(path: str, host: str = '127.0.0.1', port: int = 0, reload_interval: float = 2.0) -> QueryServer:
+    server = QueryServer((host, port), path, reload_interval)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve Echo association data over HTTP/JSON')
+    parser.add_argument('--file', required=True, help='Path to the analyzer JSON file')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8766, help='Port to bind (default: 8766)')
+    parser.add_argument('--reload-interval', type=float, default=2.0,
+                        help='Seconds between checks for a changed analysis file, 0 disables (default: 2)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server = QueryServer((args.host, args.port), args.file, args.reload_interval)
+    print(f"Loaded {len(server.dataset.model)} associations in {time.perf_counter() - start:.2f}s")
+    print(f"Query service listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
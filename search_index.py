@@ -0,0 +1,82 @@
+# Search Index: Trigram index over drug and symptom names for incremental, field-scoped table filtering
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set
+
+SEARCH_FIELDS = ('drug', 'symptom')
+FIELD_PATTERN = re.compile(r'\b(drug|symptom):(?:"([^"]*)"|(\S*))', re.IGNORECASE)
+
+
+def parse_query(query: str) -> Dict[Optional[str], str]:
+    terms = {}
+    for match in FIELD_PATTERN.finditer(query):
+        value = (match.group(2) if match.group(2) is not None else match.group(3)).lower().strip()
+        if value:
+            terms[match.group(1).lower()] = value
+    free = ' '.join(FIELD_PATTERN.sub(' ', query).split()).lower()
+    if free:
+        terms[None] = free
+    return terms
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class FieldIndex:
+    def __init__(self, values: Sequence[str]):
+        ids = {}
+        self.rows = []
+        for row, value in enumerate(values):
+            value = value.lower()
+            if value not in ids:
+                ids[value] = len(ids)
+                self.rows.append([])
+            self.rows[ids[value]].append(row)
+        self.names = list(ids)
+        self.trigrams = defaultdict(set)
+        for name_id, name in enumerate(self.names):
+            for gram in trigrams(name):
+                self.trigrams[gram].add(name_id)
+        self.previous = {}
+
+    def match(self, term: str, scope: str = 'field') -> List[int]:
+        previous_term, previous_matches = self.previous.get(scope, (None, None))
+        if previous_term is not None and previous_term in term:
+            candidates = previous_matches
+        elif len(term) >= 3:
+            postings = sorted((self.trigrams.get(g, set()) for g in trigrams(term)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:]) if postings else set()
+        else:
+            candidates = range(len(self.names))
+        matches = [name_id for name_id in candidates if term in self.names[name_id]]
+        self.previous[scope] = (term, matches)
+        return matches
+
+    def matching_rows(self, term: str, scope: str = 'field') -> Set[int]:
+        rows = set()
+        for name_id in self.match(term, scope):
+            rows.update(self.rows[name_id])
+        return rows
+
+
+class AssociationSearchIndex:
+    def __init__(self, columns):
+        self.fields = {field: FieldIndex(columns[field]) for field in SEARCH_FIELDS}
+
+    def search(self, query: str) -> Optional[List[int]]:
+        terms = parse_query(query)
+        if not terms:
+            return None
+
+        result = None
+        for field, term in sorted(terms.items(), key=lambda item: item[0] or ''):
+            if field is None:
+                rows = set().union(*(index.matching_rows(term, 'free') for index in self.fields.values()))
+            else:
+                rows = self.fields[field].matching_rows(term)
+            result = rows if result is None else result & rows
+            if not result:
+                return []
+        return sorted(result)
@@ -0,0 +1,378 @@
+# Stream Monitor: Continuous extraction over new Reddit posts/comments with sliding-window emerging-signal alerts
+
+import argparse
+import json
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from explorer_agent import CANCER_SUBREDDITS, extract_pairs
+from instrumentation import configure_from_env, inc, observe, timer
+
+DEFAULT_WINDOW = 3600.0
+DEFAULT_BUCKETS = 60
+DEFAULT_THRESHOLD = 3.0
+DEFAULT_MIN_COUNT = 5
+DEFAULT_MIN_RATE = 1.0
+DEFAULT_ALPHA = 0.005
+LATENCY_SAMPLES = 10000
+RECENT_ALERTS = 100
+
+
+def to_epoch(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def event(kind: str, item_id: str, subreddit: str, title: str, text: str, created: float,
+          score: int = 0, num_comments: int = 0, observed: Optional[float] = None) -> Dict:
+    return {
+        'kind': kind,
+        'id': item_id,
+        'subreddit': subreddit,
+        'title': title,
+        'text': text,
+        'created': created,
+        'score': score,
+        'num_comments': num_comments,
+        'observed': observed if observed is not None else time.time()
+    }
+
+
+class RedditSource:
+    def __init__(self, subreddits: List[str] = CANCER_SUBREDDITS, pause: float = 1.0, reddit=None):
+        if reddit is None:
+            import praw
+            reddit = praw.Reddit(
+                client_id="",
+                client_secret="",
+                user_agent="PharmacovigillanceResearch/1.0"
+            )
+        self.subreddit = reddit.subreddit('+'.join(subreddits))
+        self.pause = pause
+
+    def __iter__(self) -> Iterator[Dict]:
+        submissions = self.subreddit.stream.submissions(skip_existing=True, pause_after=-1)
+        comments = self.subreddit.stream.comments(skip_existing=True, pause_after=-1)
+        while True:
+            idle = True
+            for item in submissions:
+                if item is None:
+                    break
+                idle = False
+                yield event('submission', item.id, item.subreddit.display_name, item.title, item.selftext,
+                            item.created_utc, item.score, item.num_comments, observed=item.created_utc)
+            for item in comments:
+                if item is None:
+                    break
+                idle = False
+                if item.body in ('[deleted]', '[removed]'):
+                    continue
+                yield event('comment', item.id, item.subreddit.display_name, '', item.body,
+                            item.created_utc, item.score, observed=item.created_utc)
+            if idle:
+                time.sleep(self.pause)
+
+
+class ReplaySource:
+    def __init__(self, path: str, speed: float = 0.0, limit: Optional[int] = None):
+        self.path = path
+        self.speed = speed
+        self.limit = limit
+
+    def load(self) -> List[Tuple]:
+        items = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for n, line in enumerate(f):
+                if self.limit is not None and n >= self.limit:
+                    break
+                post = json.loads(line)
+                items.append((to_epoch(post['created_utc']), 'submission', post['id'], post.get('subreddit', ''),
+                              post['title'], post['text'], post.get('score', 0), post.get('num_comments', 0)))
+                for comment in post.get('comments', []):
+                    items.append((to_epoch(comment['created_utc']), 'comment', comment['id'],
+                                  post.get('subreddit', ''), '', comment['text'], comment.get('score', 0), 0))
+        items.sort(key=lambda item: item[0])
+        return items
+
+    def __iter__(self) -> Iterator[Dict]:
+        items = self.load()
+        if not items:
+            return
+        first = items[0][0]
+        start = time.time()
+        for created, kind, item_id, subreddit, title, text, score, num_comments in items:
+            if self.speed > 0:
+                due = start + (created - first) / self.speed
+                delay = due - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                observed = due
+            else:
+                observed = time.time()
+            yield event(kind, item_id, subreddit, title, text, created, score, num_comments, observed)
+
+
+class SlidingWindow:
+    def __init__(self, window: float, buckets: int, alpha: float):
+        self.bucket_seconds = window / buckets
+        self.buckets = buckets
+        self.alpha = alpha
+        self.counts = deque()
+        self.total = 0
+        self.first = None
+        self.current = None
+        self.current_count = 0
+        self.settled = None
+        self.seed = 0
+        self.baseline = 0.0
+        self.warm = False
+
+    def fold(self, bucket: int, count: int):
+        if bucket <= self.settled:
+            return
+        if not self.warm:
+            end = self.first + self.buckets - 1
+            if bucket < end:
+                self.seed += count
+                self.settled = bucket
+                return
+            self.seed += count if bucket == end else 0
+            self.baseline = self.seed / self.buckets
+            self.settled = end
+            self.warm = True
+            if bucket == end:
+                return
+        gap = bucket - self.settled - 1
+        self.baseline = self.alpha * count + (1 - self.alpha) * self.baseline * (1 - self.alpha) ** gap
+        self.settled = bucket
+
+    def advance(self, bucket: int):
+        if self.current is None:
+            self.first = self.current = bucket
+            self.settled = bucket - 1
+            return
+        if bucket > self.current:
+            if self.current_count:
+                self.counts.append((self.current, self.current_count))
+            self.current = bucket
+            self.current_count = 0
+        horizon = bucket - self.buckets
+        while self.counts and self.counts[0][0] <= horizon:
+            expired, count = self.counts.popleft()
+            self.total -= count
+            self.fold(expired, count)
+        self.fold(horizon, 0)
+
+    def add(self, timestamp: float, count: int = 1):
+        self.advance(int(timestamp // self.bucket_seconds))
+        self.current_count += count
+        self.total += count
+
+    def rate(self) -> float:
+        return self.total / (self.buckets * self.bucket_seconds)
+
+    def baseline_rate(self) -> float:
+        return self.baseline / self.bucket_seconds
+
+
+class LatencyTracker:
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.values = deque(maxlen=samples)
+        self.count = 0
+
+    def add(self, value: float):
+        self.values.append(value)
+        self.count += 1
+
+    def percentile(self, p: float) -> float:
+        if not self.values:
+            return 0.0
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(max(self.values, default=0.0) * 1000, 3)
+        }
+
+
+class StreamMonitor:
+    def __init__(self, window: float = DEFAULT_WINDOW, buckets: int = DEFAULT_BUCKETS,
+                 threshold: float = DEFAULT_THRESHOLD, min_count: int = DEFAULT_MIN_COUNT,
+                 min_rate: float = DEFAULT_MIN_RATE, alpha: float = DEFAULT_ALPHA,
+                 on_alert: Optional[Callable[[Dict], None]] = None):
+        self.window = window
+        self.buckets = buckets
+        self.threshold = threshold
+        self.min_count = min_count
+        self.min_rate = min_rate / 3600
+        self.alpha = alpha
+        self.on_alert = on_alert
+        self.pairs = {}
+        self.alerting = set()
+        self.alerts = deque(maxlen=RECENT_ALERTS)
+        self.alert_count = 0
+        self.events = 0
+        self.event_latency = LatencyTracker()
+        self.alert_latency = LatencyTracker()
+        self.clock = 0.0
+
+    def expire(self):
+        horizon = int(self.clock // (self.window / self.buckets))
+        for pair in [p for p, w in self.pairs.items() if w.current is not None and w.current < horizon - self.buckets]:
+            window = self.pairs[pair]
+            window.advance(horizon)
+            if not window.total and window.baseline < 1e-3:
+                del self.pairs[pair]
+                self.alerting.discard(pair)
+
+    def process(self, item: Dict) -> List[Dict]:
+        with timer('monitor_event_seconds', kind=item['kind']):
+            post_data = {'title': item['title'], 'text': item['text'],
+                         'score': item['score'], 'num_comments': item['num_comments']}
+            pairs = {(e['drug_canonical'], e['side_effect_medical']) for e in extract_pairs(post_data)}
+            self.events += 1
+            self.clock = max(self.clock, item['created'])
+            inc('monitor_events_total', kind=item['kind'])
+
+            alerts = []
+            for pair in pairs:
+                window = self.pairs.get(pair)
+                if window is None:
+                    window = self.pairs[pair] = SlidingWindow(self.window, self.buckets, self.alpha)
+                window.add(item['created'])
+                baseline = max(window.baseline_rate(), self.min_rate)
+                if window.warm and window.total >= self.min_count and window.rate() >= self.threshold * baseline:
+                    if pair not in self.alerting:
+                        self.alerting.add(pair)
+                        alerts.append(self.alert(pair, window, baseline, item))
+                elif window.rate() < self.threshold * baseline:
+                    self.alerting.discard(pair)
+
+            if self.events % 1000 == 0:
+                self.expire()
+
+        latency = time.time() - item['observed']
+        self.event_latency.add(latency)
+        for alert in alerts:
+            alert['latency_ms'] = round(latency * 1000, 3)
+            self.alert_latency.add(latency)
+            observe('monitor_alert_latency_seconds', latency)
+            if self.on_alert:
+                self.on_alert(alert)
+        return alerts
+
+    def alert(self, pair: Tuple[str, str], window: SlidingWindow, baseline: float, item: Dict) -> Dict:
+        inc('monitor_alerts_total')
+        self.alert_count += 1
+        alert = {
+            'drug': pair[0],
+            'symptom': pair[1],
+            'window_count': window.total,
+            'rate_per_hour': round(window.rate() * 3600, 3),
+            'baseline_per_hour': round(baseline * 3600, 3),
+            'ratio': round(window.rate() / baseline, 2),
+            'trigger': {'kind': item['kind'], 'id': item['id'], 'subreddit': item['subreddit'],
+                        'created': datetime.fromtimestamp(item['created'], timezone.utc).isoformat()},
+        }
+        self.alerts.append(alert)
+        return alert
+
+    def report(self) -> Dict:
+        return {
+            'events': self.events,
+            'tracked_pairs': len(self.pairs),
+            'alerts': self.alert_count,
+            'event_latency': self.event_latency.summary(),
+            'alert_latency': self.alert_latency.summary(),
+        }
+
+
+def print_report(report: Dict):
+    events, alerts = report['event_latency'], report['alert_latency']
+    print(f"Events: {report['events']}, tracked pairs: {report['tracked_pairs']}, alerts: {report['alerts']}")
+    print(f"  post->processed latency p50 {events['p50_ms']} ms, p99 {events['p99_ms']} ms")
+    print(f"  post->alert latency     p50 {alerts['p50_ms']} ms, p99 {alerts['p99_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monitor Reddit continuously for emerging drug-symptom signals')
+    subparsers = parser.add_subparsers(dest='source', required=True)
+
+    reddit_parser = subparsers.add_parser('reddit', help='Stream new submissions and comments from Reddit')
+    reddit_parser.add_argument('--subreddits', nargs='+', default=CANCER_SUBREDDITS,
+                               help='Subreddits to follow (default: CANCER_SUBREDDITS)')
+
+    replay_parser = subparsers.add_parser('replay', help='Replay a posts.jsonl file (e.g. from synthetic_corpus.py)')
+    replay_parser.add_argument('--file', required=True, help='JSONL file of posts with comments')
+    replay_parser.add_argument('--speed', type=float, default=0.0,
+                               help='Replay speed-up over real time, 0 replays as fast as possible (default: 0)')
+    replay_parser.add_argument('--limit', type=int, help='Replay at most this many posts')
+
+    for sub in (reddit_parser, replay_parser):
+        sub.add_argument('--window', type=float, default=DEFAULT_WINDOW,
+                         help='Sliding window length in seconds (default: 3600)')
+        sub.add_argument('--buckets', type=int, default=DEFAULT_BUCKETS,
+                         help='Buckets per window, bounding memory per pair (default: 60)')
+        sub.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help='Alert when the window rate reaches this multiple of the baseline (default: 3)')
+        sub.add_argument('--min-count', type=int, default=DEFAULT_MIN_COUNT,
+                         help='Minimum mentions in the window before alerting (default: 5)')
+        sub.add_argument('--min-rate', type=float, default=DEFAULT_MIN_RATE,
+                         help='Baseline floor in mentions per hour (default: 1)')
+        sub.add_argument('--alpha', type=float, default=DEFAULT_ALPHA,
+                         help='Per-bucket smoothing factor of the baseline rate (default: 0.005)')
+        sub.add_argument('--alerts', help='Append alerts as JSON lines to this file')
+        sub.add_argument('--report-every', type=float, default=30.0,
+                         help='Seconds between latency reports (default: 30)')
+        sub.add_argument('--output', '-o', help='Write the final report as JSON to this path')
+
+    args = parser.parse_args()
+
+    alerts_file = open(args.alerts, 'a', encoding='utf-8') if args.alerts else None
+
+    def on_alert(alert: Dict):
+        print(f"🚨 {alert['drug']} / {alert['symptom']}: {alert['window_count']} mentions in window, "
+              f"{alert['rate_per_hour']}/h vs baseline {alert['baseline_per_hour']}/h "
+              f"(x{alert['ratio']}, {alert['latency_ms']} ms after post)")
+        if alerts_file:
+            alerts_file.write(json.dumps(alert, ensure_ascii=False) + '\n')
+            alerts_file.flush()
+
+    monitor = StreamMonitor(args.window, args.buckets, args.threshold, args.min_count,
+                            args.min_rate, args.alpha, on_alert)
+    source = RedditSource(args.subreddits) if args.source == 'reddit' else ReplaySource(args.file, args.speed, args.limit)
+
+    print(f"Monitoring {args.source} source (window {args.window:.0f}s, threshold x{args.threshold})...")
+    last_report = time.time()
+    try:
+        for item in source:
+            monitor.process(item)
+            if time.time() - last_report >= args.report_every:
+                print_report(monitor.report())
+                last_report = time.time()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if alerts_file:
+            alerts_file.close()
+
+    report = monitor.report()
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to: {args.output}")
+
+if __name__ == '__main__':
+    configure_from_env()
+    main()
@@ -0,0 +1,248 @@
+# Synthetic Corpus: Seeded Reddit-style posts and matching analyzer-format files for benchmarks and demos
+
+import argparse
+import json
+import random
+import shutil
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from explorer_agent import ONCOLOGY_DRUGS, CANCER_SUBREDDITS, SYMPTOM_WORDS
+
+CONFOUNDERS = [
+    'chemotherapy', 'radiation', 'dexamethasone', 'ondansetron', 'surgery', 'anemia',
+    'infection', 'depression', 'insomnia', 'opioids', 'steroids', 'dehydration',
+    'hypothyroidism', 'stress', 'neutropenia', 'diabetes', 'age', 'alcohol'
+]
+
+TITLES = [
+    "Question about side effects", "Week {n} update", "Anyone else dealing with this?",
+    "Finished cycle {n}", "Newly diagnosed and scared", "Good news after scan",
+    "Tips for getting through treatment", "Switching treatments", "Rough week", "Caregiver here, need advice"
+]
+
+FILLER = [
+    "My oncologist says the scans look stable",
+    "Had bloodwork again this morning",
+    "The infusion center staff have been amazing",
+    "Insurance finally approved the next round",
+    "Trying to stay positive and keep walking every day",
+    "My family has been really supportive",
+    "Next appointment is in two weeks",
+    "I keep a journal of everything to show my care team",
+    "Does anyone have tips for long infusion days",
+    "Waiting on pathology results is the worst part"
+]
+
+DRUG_ONLY = [
+    "I just started {drug} last week",
+    "My doctor wants to switch me to {drug}",
+    "Has anyone here been on {drug} long term",
+    "Round {n} of {drug} is done"
+]
+
+DRUG_SYMPTOM = [
+    "I started {drug} a month ago and I've been experiencing {symptom} ever since",
+    "{drug} gave me {symptom} within the first few days",
+    "The side effects of {drug} for me include {symptom}",
+    "Since starting {drug} I've had {symptom} most days",
+    "Anyone else get {symptom} on {drug}",
+    "The {symptom} from {drug} got better after the second cycle"
+]
+
+BASE_DATE = datetime(2024, 1, 1)
+
+
+def zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+class CorpusGenerator:
+    def __init__(self, seed: int = 0, drug_rate: float = 0.3, symptom_rate: float = 0.5,
+                 comments_mean: float = 4.0, sentences: Tuple[int, int] = (3, 8)):
+        self.rng = random.Random(seed)
+        self.drug_rate = drug_rate
+        self.symptom_rate = symptom_rate
+        self.comments_mean = comments_mean
+        self.sentences = sentences
+
+        self.drugs = list(ONCOLOGY_DRUGS)
+        self.rng.shuffle(self.drugs)
+        self.drug_weights = zipf_weights(len(self.drugs))
+        self.symptom_weights = zipf_weights(len(SYMPTOM_WORDS), 0.8)
+        self.confounder_weights = zipf_weights(len(CONFOUNDERS), 0.9)
+        self.next_id = 0
+
+    def new_id(self) -> str:
+        self.next_id += 1
+        value, digits = self.next_id, ''
+        while value:
+            value, r = divmod(value, 36)
+            digits = '0123456789abcdefghijklmnopqrstuvwxyz'[r] + digits
+        return digits
+
+    def sentence(self) -> Tuple[str, Optional[Tuple[str, str]]]:
+        rng = self.rng
+        if rng.random() >= self.drug_rate:
+            return rng.choice(FILLER), None
+        drug = rng.choices(self.drugs, self.drug_weights)[0]
+        if rng.random() >= self.symptom_rate:
+            return rng.choice(DRUG_ONLY).format(drug=drug, n=rng.randint(1, 12)), None
+        symptom = rng.choices(SYMPTOM_WORDS, self.symptom_weights)[0]
+        return rng.choice(DRUG_SYMPTOM).format(drug=drug, symptom=symptom), (drug, symptom)
+
+    def passage(self, low: int, high: int) -> Tuple[str, List[Tuple[str, str, str]]]:
+        parts, mentions = [], []
+        for _ in range(self.rng.randint(low, high)):
+            text, mention = self.sentence()
+            parts.append(text)
+            if mention:
+                mentions.append((mention[0], mention[1], text))
+        return '. '.join(parts) + '.', mentions
+
+    def extraction(self, drug: str, symptom: str, quote: str, community_metric: int) -> Dict:
+        rng = self.rng
+        return {
+            "drug": drug,
+            "drug_canonical": drug,
+            "side_effect": symptom,
+            "side_effect_medical": symptom,
+            "temporal_weight": round(rng.random(), 2),
+            "age": rng.randint(18, 85),
+            "severity": rng.choice(["mild", "moderate", "severe", "not specified"]),
+            "quote": quote[:200],
+            "confidence": round(rng.uniform(0.5, 0.95), 2),
+            "community_metric": community_metric,
+            "confounders": sorted(set(rng.choices(CONFOUNDERS, self.confounder_weights, k=rng.randint(0, 3))))
+        }
+
+    def post(self) -> Tuple[Dict, List[Dict]]:
+        rng = self.rng
+        created = BASE_DATE + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        text, mentions = self.passage(*self.sentences)
+        post_id = self.new_id()
+        post = {
+            'id': post_id,
+            'title': rng.choice(TITLES).format(n=rng.randint(1, 20)),
+            'text': text,
+            'author': f"user_{rng.randrange(100000)}",
+            'subreddit': rng.choice(CANCER_SUBREDDITS),
+            'created_utc': created.isoformat(),
+            'score': int(rng.paretovariate(1.5)) - 1,
+            'url': f"https://www.reddit.com/comments/{post_id}",
+            'num_comments': 0,
+            'comments': []
+        }
+        for _ in range(int(rng.expovariate(1 / self.comments_mean)) if self.comments_mean > 0 else 0):
+            comment_text, comment_mentions = self.passage(1, 3)
+            mentions.extend(comment_mentions)
+            post['comments'].append({
+                'id': self.new_id(),
+                'text': comment_text,
+                'author': f"user_{rng.randrange(100000)}",
+                'created_utc': (created + timedelta(minutes=rng.randrange(1, 10000))).isoformat(),
+                'score': int(rng.paretovariate(2.0)) - 1
+            })
+        post['num_comments'] = len(post['comments'])
+
+        community_metric = post['score'] + post['num_comments']
+        extractions = [self.extraction(drug, symptom, quote, community_metric) for drug, symptom, quote in mentions]
+        return post, extractions
+
+    def corpus(self, n_posts: int) -> Iterator[Tuple[Dict, List[Dict]]]:
+        for _ in range(n_posts):
+            yield self.post()
+
+
+def read_marker(out_dir: Path) -> Optional[Dict]:
+    try:
+        with open(out_dir / 'corpus.json', 'r', encoding='utf-8') as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return marker if isinstance(marker, dict) and {'posts', 'seed'} <= marker.keys() else None
+
+
+def write_marker(out_dir: Path, marker: Dict):
+    with open(out_dir / 'corpus.json', 'w', encoding='utf-8') as f:
+        json.dump(marker, f, indent=2)
+
+
+def write_corpus(out_dir, n_posts: int, seed: int = 0, analyze: bool = True, **options) -> Dict:
+    out_dir = Path(out_dir)
+    aggregate_dir = out_dir / 'aggregate'
+    if out_dir.exists() and any(out_dir.iterdir()):
+        if read_marker(out_dir) is None:
+            raise FileExistsError(f"{out_dir} is not empty and was not written by synthetic_corpus.py")
+        if aggregate_dir.exists():
+            shutil.rmtree(aggregate_dir)
+        for stale in [out_dir / 'posts.jsonl', *out_dir.glob('side_effects_analysis*')]:
+            stale.unlink(missing_ok=True)
+    aggregate_dir.mkdir(parents=True)
+    write_marker(out_dir, {'posts': n_posts, 'seed': seed, 'complete': False})
+
+    handles = {}
+    stats = {'posts': n_posts, 'comments': 0, 'extractions': 0, 'seed': seed}
+    try:
+        with open(out_dir / 'posts.jsonl', 'w', encoding='utf-8') as posts_file:
+            for post, extractions in CorpusGenerator(seed, **options).corpus(n_posts):
+                posts_file.write(json.dumps(post, ensure_ascii=False) + '\n')
+                stats['comments'] += post['num_comments']
+                stats['extractions'] += len(extractions)
+                for extraction in extractions:
+                    drug = extraction['drug_canonical']
+                    if drug not in handles:
+                        handles[drug] = open(aggregate_dir / f"{drug}.json", 'w', encoding='utf-8')
+                        handles[drug].write('[\n')
+                    else:
+                        handles[drug].write(',\n')
+                    handles[drug].write(json.dumps(extraction, ensure_ascii=False))
+    finally:
+        for handle in handles.values():
+            handle.write('\n]\n')
+            handle.close()
+    stats['drugs'] = len(handles)
+
+    if analyze:
+        from analyzer_agent import analyze_side_effects
+        with redirect_stdout(StringIO()):
+            analyze_side_effects(aggregate_dir, out_dir / 'side_effects_analysis.json')
+
+    write_marker(out_dir, {**stats, 'options': options, 'complete': True})
+    return stats
+
+
+def iter_posts(path) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a seeded synthetic Reddit corpus and analyzer-format files')
+    parser.add_argument('--posts', type=int, default=10000, help='Number of posts to generate (default: 10000)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--output-dir', '-o', default='synthetic_data', help='Output directory (default: synthetic_data)')
+    parser.add_argument('--drug-rate', type=float, default=0.3,
+                        help='Probability that a sentence mentions a drug (default: 0.3)')
+    parser.add_argument('--symptom-rate', type=float, default=0.5,
+                        help='Probability that a drug sentence also mentions a symptom (default: 0.5)')
+    parser.add_argument('--comments', type=float, default=4.0, help='Mean comments per post (default: 4)')
+    parser.add_argument('--no-analysis', action='store_true', help='Skip writing side_effects_analysis.json')
+    args = parser.parse_args()
+
+    try:
+        stats = write_corpus(args.output_dir, args.posts, args.seed, analyze=not args.no_analysis,
+                             drug_rate=args.drug_rate, symptom_rate=args.symptom_rate, comments_mean=args.comments)
+    except FileExistsError as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Generated {stats['posts']} posts, {stats['comments']} comments and "
+          f"{stats['extractions']} extractions across {stats['drugs']} drugs in {args.output_dir}")
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,59 @@
+# Columnar Store tests: analyzer JSON survives a round trip through the .echocol format
+
+from columnar_store import ColumnarEvidence, read_analysis, write_analysis
+
+ANALYSIS = {
+    "keytruda": {
+        "fatigue": [
+            {"temporal_weight": 0.5, "confidence": 0.6, "community_metric": 12,
+             "confounders": ["chemotherapy", "age"], "quote": "Since starting keytruda I have had fatigue"},
+            {"temporal_weight": 1, "confidence": None, "community_metric": 3.5,
+             "confounders": None, "quote": None},
+        ],
+        "rash": [],
+        "névralgie": [
+            {"temporal_weight": None, "confidence": 0.9, "community_metric": 0,
+             "confounders": [], "quote": "douleur après la perfusion ✓"},
+        ],
+    },
+    "no symptoms yet": {},
+    "xeloda": {
+        "fatigue": [
+            {"temporal_weight": 0.25, "confidence": 0.7, "community_metric": 7,
+             "confounders": ["age"], "quote": ""},
+        ],
+    },
+}
+
+
+def test_round_trip_is_exact(tmp_path):
+    path = tmp_path / "analysis.echocol"
+    write_analysis(path, ANALYSIS)
+    result = read_analysis(path)
+    assert result == ANALYSIS
+    assert list(result) == list(ANALYSIS)
+    types = [type(e["community_metric"]) for e in result["keytruda"]["fatigue"]]
+    assert types == [int, float]
+    assert type(result["keytruda"]["fatigue"][1]["temporal_weight"]) is int
+
+
+def test_empty_analysis(tmp_path):
+    for analysis in ({}, {"d": {}}):
+        path = tmp_path / "empty.echocol"
+        write_analysis(path, analysis)
+        assert read_analysis(path) == analysis
+
+
+def test_field_subset_and_evidence(tmp_path):
+    path = tmp_path / "analysis.echocol"
+    write_analysis(path, ANALYSIS)
+    confounders = read_analysis(path, fields=("confounders",))
+    assert confounders["keytruda"]["fatigue"] == [{"confounders": ["chemotherapy", "age"]}, {"confounders": None}]
+
+    evidence = ColumnarEvidence(path)
+    try:
+        record = evidence.get(0, 2)
+        assert record == {"confounders": ["age", "chemotherapy"], "quotes": ["Since starting keytruda I have had fatigue"]}
+        assert evidence.get(0, 2) is record
+    finally:
+        evidence.close()
@@ -0,0 +1,37 @@
+# Stream Monitor tests: flat streams stay quiet, bursts over an established baseline alert once
+
+from stream_monitor import StreamMonitor, event
+
+START = 1_700_000_000.0
+TEXT = "Since starting keytruda I have had fatigue most days."
+
+
+def posts(start: float, hours: float, per_hour: float):
+    step = 3600 / per_hour
+    for n in range(int(hours * per_hour)):
+        created = start + n * step
+        yield event('submission', f"t{created:.0f}", 'cancer', '', TEXT, created, observed=created)
+
+
+def run(monitor: StreamMonitor, items):
+    return [alert for item in items for alert in monitor.process(item)]
+
+
+def test_flat_stream_produces_no_alerts():
+    monitor = StreamMonitor()
+    assert run(monitor, posts(START, 24, 20)) == []
+    assert monitor.alert_count == 0
+
+
+def test_no_alerts_before_a_full_window_of_history():
+    monitor = StreamMonitor()
+    assert run(monitor, posts(START, 0.9, 200)) == []
+
+
+def test_burst_over_baseline_alerts_once():
+    monitor = StreamMonitor()
+    assert run(monitor, posts(START, 6, 5)) == []
+    alerts = run(monitor, posts(START + 6 * 3600, 0.5, 120))
+    assert len(alerts) == 1
+    assert (alerts[0]['drug'], alerts[0]['symptom']) == ('keytruda', 'fatigue')
+    assert alerts[0]['ratio'] >= monitor.threshold
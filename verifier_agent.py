@@ -3,10 +3,15 @@
 import requests
 import json
 import re
+import time
 from typing import Dict, List, Tuple, Optional, Iterable, Set
 from collections import Counter
 import math
 
+from instrumentation import inc, timed, timer
+
+OPENFDA_BASE_URL = "https://api.fda.gov"
+
 def get_variants_and_terms(extractor, drug_name, receivedate_range=None):
     variants = extractor.get_product_name_variants(drug_name)
     faers_terms = extractor.get_faers_term_counts(
@@ -17,6 +22,7 @@ def get_variants_and_terms(extractor, drug_name, receivedate_range=None):
     )
     return variants, faers_terms
 
+@timed('verifier_score_seconds')
 def get_side_effect_score(extractor, variants, faers_terms, drug_name: str, side_effect: str,
                           receivedate_range=None, label_boost: float = 2.0):
     count = 0
@@ -27,7 +33,7 @@ def get_side_effect_score(extractor, variants, faers_terms, drug_name: str, side
 
     score = math.log1p(count)
 
-    labeling = extractor.search_drug_labeling(drug_name)
+    labeling = extractor.search_drug_labeling(drug_name) or {}
     adverse_text = ' '.join(
         ' '.join(r.get('adverse_reactions', []))
         for r in labeling.get('results', [])
@@ -44,9 +50,41 @@ def get_side_effect_score(extractor, variants, faers_terms, drug_name: str, side
     }
 
 class FDAAdverseReactionExtractor:
-    def __init__(self):
-        self.label_url = "https://api.fda.gov/drug/label.json"
-        self.faers_url = "https://api.fda.gov/drug/event.json"
+    def __init__(self, base_url: str = OPENFDA_BASE_URL, max_retries: int = 3, backoff: float = 1.0,
+                 timeout: float = 30.0):
+        self.label_url = f"{base_url.rstrip('/')}/drug/label.json"
+        self.faers_url = f"{base_url.rstrip('/')}/drug/event.json"
+        self.session = requests.Session()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.errors = Counter()
+
+    def _record_error(self, url: str, error: Exception):
+        endpoint = 'label' if url == self.label_url else 'event'
+        status = getattr(getattr(error, 'response', None), 'status_code', None) or type(error).__name__
+        self.errors[endpoint] += 1
+        inc('verifier_openfda_errors_total', endpoint=endpoint, status=status)
+
+    def _get(self, url: str, params: Dict) -> Dict:
+        endpoint = 'label' if url == self.label_url else 'event'
+        for attempt in range(self.max_retries + 1):
+            with timer('verifier_openfda_request_seconds', endpoint=endpoint):
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            inc('verifier_openfda_requests_total', endpoint=endpoint, status=response.status_code)
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt == self.max_retries:
+                break
+            try:
+                delay = float(response.headers['Retry-After'])
+            except (KeyError, ValueError):
+                delay = self.backoff * (2 ** attempt)
+            inc('verifier_openfda_backoff_seconds_total', delay, endpoint=endpoint)
+            time.sleep(delay)
+        if response.status_code == 404:
+            return {}
+        response.raise_for_status()
+        return response.json()
 
     def search_drug_labeling(self, drug_name: str, target_year: Optional[int] = None, limit: int = 50) -> Dict:
         search_query = f'openfda.generic_name:"{drug_name}" OR openfda.brand_name:"{drug_name}"'
@@ -55,9 +93,7 @@ class FDAAdverseReactionExtractor:
             'limit': limit
         }
         try:
-            response = requests.get(self.label_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get(self.label_url, params)
 
             results = data.get("results", [])
             if target_year:
@@ -65,5 +101,36 @@ class FDAAdverseReactionExtractor:
             data["results"] = results
             return data
 
-        except:
-            return
\ No newline at end of file
+        except requests.RequestException as e:
+            self._record_error(self.label_url, e)
+            return
+
+    def _filter_by_year(self, results: List[Dict], target_year: int) -> List[Dict]:
+        return [r for r in results if str(r.get('effective_time', '')).startswith(str(target_year))]
+
+    def get_product_name_variants(self, drug_name: str) -> List[str]:
+        variants = {drug_name.lower()}
+        labeling = self.search_drug_labeling(drug_name) or {}
+        for result in labeling.get('results', []):
+            openfda = result.get('openfda', {})
+            for name in openfda.get('brand_name', []) + openfda.get('generic_name', []):
+                variants.add(name.lower())
+        return sorted(variants)
+
+    def get_faers_term_counts(self, variants: Iterable[str], limit: int = 200, min_count: int = 1,
+                              receivedate_range: Optional[Tuple[str, str]] = None) -> List[Tuple[str, int]]:
+        drugs = ' OR '.join(f'"{v}"' for v in variants)
+        search_query = f'patient.drug.medicinalproduct:({drugs})'
+        if receivedate_range:
+            search_query += f' AND receivedate:[{receivedate_range[0]} TO {receivedate_range[1]}]'
+        params = {
+            'search': search_query,
+            'count': 'patient.reaction.reactionmeddrapt.exact',
+            'limit': limit
+        }
+        try:
+            data = self._get(self.faers_url, params)
+        except requests.RequestException as e:
+            self._record_error(self.faers_url, e)
+            return []
+        return [(r['term'], r['count']) for r in data.get('results', []) if r.get('count', 0) >= min_count]